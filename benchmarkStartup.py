@@ -0,0 +1,51 @@
+import os
+import sys
+import sqlite3
+import subprocess
+import tempfile
+import time
+
+# Measures how long `import geneticAlgorithm` takes against planner tables of different sizes.
+# Run with: python benchmarkStartup.py
+
+repositoryPath = os.path.dirname(os.path.abspath(__file__))
+tableSizes = [None, 0, 1000, 10000, 100000]  # None runs without any data.db
+repeats = 5
+
+
+# Function to create a planner database with the given number of rows
+def createDatabase(path, numRows):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE planner (id INTEGER PRIMARY KEY AUTOINCREMENT, task TEXT, completed TEXT, date TEXT, startTime TEXT, endTime TEXT, priority INTEGER)")
+    rows = (("Task " + str(i), "NO", f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", "09:00", "10:00", i % 4 + 1) for i in range(numRows))
+    conn.executemany("INSERT INTO planner (task, completed, date, startTime, endTime, priority) VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+# Function to time a fresh interpreter running a statement in a directory, returns the fastest run
+def timeImport(workingDirectory, statement="import geneticAlgorithm"):
+    environment = dict(os.environ, PYTHONPATH=repositoryPath)
+    timings = []
+    for _ in range(repeats):
+        startTime = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=workingDirectory, env=environment, check=True)
+        timings.append(time.perf_counter() - startTime)
+    return min(timings)
+
+
+def main():
+    # The interpreter and numpy start up in every run, measure them alone as a baseline
+    with tempfile.TemporaryDirectory() as workingDirectory:
+        print(f"{'interpreter + dependencies':>28}: {timeImport(workingDirectory, 'import numpy, prettytable'):.3f}s")
+
+    for numRows in tableSizes:
+        with tempfile.TemporaryDirectory() as workingDirectory:
+            if numRows is not None:
+                createDatabase(os.path.join(workingDirectory, "data.db"), numRows)
+            label = "no database" if numRows is None else f"{numRows} rows"
+            print(f"{label:>28}: {timeImport(workingDirectory):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import geneticAlgorithm as ga
+
+# Times the genetic algorithm operators and whole runs on seeded synthetic tasks.
+# Run with: python benchmarkSuite.py
+# Save the results as the baseline with --save-baseline, later runs are compared against it
+# and the script exits with 1 when a benchmark is slower than the baseline by more than --tolerance.
+
+repositoryPath = os.path.dirname(os.path.abspath(__file__))
+baselinePath = os.path.join(repositoryPath, 'benchmarkBaseline.json')
+
+taskCounts = [10, 100, 1000, 10000]
+overlapDensities = {'sparse': 8, 'dense': 48}  # Tasks per day, more tasks on a day means more of them overlap
+benchmarkSeed = 1234
+minimumSeconds = 0.2  # Each operator is repeated for at least this long
+runGenerations = 50
+initialisationStrategies = ['random', 'sorted', 'greedy', 'mixed']
+targetGenerations = 200  # Random initialisation runs this long to set the fitness the other strategies have to reach
+tolerance = 0.2
+
+
+########## Synthetic Tasks ##########
+
+# Function to generate a reproducible list of task dicts, tasksPerDay tasks are spread over each day
+def generateTasks(numTasks, tasksPerDay, seed=benchmarkSeed):
+    generator = random.Random(seed)
+    tasks = []
+    for i in range(numTasks):
+        date = datetime.date(2024, 1, 1) + datetime.timedelta(days=i // tasksPerDay)
+        duration = generator.randint(3, 24) * 5
+        startTime = generator.randrange(6 * 60, 22 * 60 - duration, 5)
+        tasks.append({
+            'task_name': f"Task {i}",
+            'date': str(date),
+            'start_time': ga.minutesToTime(startTime),
+            'end_time': ga.minutesToTime(startTime + duration),
+            'priority': generator.randint(1, 4),
+        })
+    return tasks
+
+##################################################
+
+
+########## Benchmarks ##########
+
+# Each benchmark takes the compiled tasks and a population and returns the operation to time.
+# maxTasks skips sizes where a single operation would take too long to be useful
+def evaluateScheduleBenchmark(tasks, population, fitnessScores):
+    return lambda: ga.evaluateSchedule(population[0])
+
+def evaluateScheduleSweepBenchmark(tasks, population, fitnessScores):
+    return lambda: ga.evaluateScheduleSweep(population[0])
+
+def evaluatePopulationBenchmark(tasks, population, fitnessScores):
+    return lambda: ga.evaluatePopulation(population)
+
+def defaultConstraintPipelineBenchmark(tasks, population, fitnessScores):
+    pipeline = ga.defaultConstraintPipeline()
+    return lambda: pipeline.evaluatePopulation(population)
+
+def extendedConstraintPipelineBenchmark(tasks, population, fitnessScores):
+    pipeline = ga.defaultConstraintPipeline().register(ga.PinnedConstraint()).register(ga.WorkingHoursConstraint())
+    return lambda: pipeline.evaluatePopulation(population)
+
+def tournamentSelectionBenchmark(tasks, population, fitnessScores):
+    return lambda: ga.tournamentSelection(population, fitnessScores, ga.tournamentSize)
+
+def rouletteWheelSelectionBenchmark(tasks, population, fitnessScores):
+    return lambda: ga.rouletteWheelSelection(population, fitnessScores)
+
+def rankBasedSelectionBenchmark(tasks, population, fitnessScores):
+    return lambda: ga.rankBasedSelection(population, fitnessScores)
+
+def crossoverBenchmark(crossover):
+    def benchmark(tasks, population, fitnessScores):
+        return lambda: crossover(population[0], population[1])
+    return benchmark
+
+def mutateBenchmark(tasks, population, fitnessScores):
+    return lambda: ga.mutate(population[0])
+
+def collisionFreeMutateBenchmark(tasks, population, fitnessScores):
+    return lambda: ga.mutate(population[0], collisionFreeMutation=True)
+
+def mutateTimeBenchmark(tasks, population, fitnessScores):
+    schedule = population[0]
+    return lambda: ga.mutateTime(schedule.startTimes[0], schedule.endTimes[0], schedule)
+
+operatorBenchmarks = {
+    'evaluateSchedule': (evaluateScheduleBenchmark, 1000),
+    'evaluateScheduleSweep': (evaluateScheduleSweepBenchmark, None),
+    'evaluatePopulation': (evaluatePopulationBenchmark, None),
+    'defaultConstraintPipeline': (defaultConstraintPipelineBenchmark, None),
+    'extendedConstraintPipeline': (extendedConstraintPipelineBenchmark, None),
+    'tournamentSelection': (tournamentSelectionBenchmark, None),
+    'rouletteWheelSelection': (rouletteWheelSelectionBenchmark, None),
+    'rankBasedSelection': (rankBasedSelectionBenchmark, None),
+    'onePointcrossover': (crossoverBenchmark(ga.onePointcrossover), None),
+    'twoPointcrossover': (crossoverBenchmark(ga.twoPointcrossover), None),
+    'uniformCrossover': (crossoverBenchmark(ga.uniformCrossover), None),
+    'mutate': (mutateBenchmark, None),
+    'collisionFreeMutate': (collisionFreeMutateBenchmark, None),
+    'mutateTime': (mutateTimeBenchmark, None),
+}
+
+# Function to repeat an operation for at least minimumSeconds, returns operations per second and the peak memory of one call
+def timeOperation(operation, minimumSeconds=minimumSeconds):
+    tracemalloc.start()
+    operation()
+    peakMemory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    count = 0
+    startTime = time.perf_counter()
+    while True:
+        operation()
+        count += 1
+        elapsedSeconds = time.perf_counter() - startTime
+        if elapsedSeconds >= minimumSeconds:
+            return count / elapsedSeconds, peakMemory
+
+def benchmarkOperators(tasks):
+    random.seed(benchmarkSeed)
+    compiledTasks = ga.CompiledTasks(tasks)
+    population = ga.initialiseSchedule(compiledTasks, ga.populationSize)
+    fitnessScores = ga.evaluatePopulation(population)
+
+    results = {}
+    for name, (benchmark, benchmarkMaxTasks) in operatorBenchmarks.items():
+        if benchmarkMaxTasks is not None and len(tasks) > benchmarkMaxTasks:
+            continue
+        random.seed(benchmarkSeed)
+        opsPerSecond, peakMemory = timeOperation(benchmark(compiledTasks, population, fitnessScores))
+        results[name] = {'opsPerSecond': opsPerSecond, 'peakMemoryBytes': peakMemory}
+    return results
+
+# Function to time a whole genetic algorithm run for a fixed number of generations
+def benchmarkRun(tasks, generations=runGenerations):
+    random.seed(benchmarkSeed)
+    termination = ga.TerminationCriteria(maxGenerations=generations, stallGenerations=None)
+
+    tracemalloc.start()
+    result = ga.geneticAlgorithm(tasks, termination=termination, verbose=False)
+    peakMemory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # Memory tracing slows the run down, so it is timed again without it
+    random.seed(benchmarkSeed)
+    termination = ga.TerminationCriteria(maxGenerations=generations, stallGenerations=None)
+    result = ga.geneticAlgorithm(tasks, termination=termination, verbose=False)
+
+    return {
+        'opsPerSecond': result['generations'] / result['elapsedSeconds'],
+        'peakMemoryBytes': peakMemory,
+        'bestFitness': result['bestFitness'],
+        'elapsedSeconds': result['elapsedSeconds'],
+    }
+
+# Function to measure how quickly each initialisation strategy reaches the fitness a random start reaches after generations
+def benchmarkInitialisation(tasks, generations=targetGenerations):
+    reference = ga.geneticAlgorithm(tasks, termination=ga.TerminationCriteria(maxGenerations=generations, stallGenerations=None),
+                                    verbose=False, seed=benchmarkSeed, initialisation='random')
+    targetFitness = reference['bestFitness']
+
+    results = {}
+    for strategy in initialisationStrategies:
+        termination = ga.TerminationCriteria(maxGenerations=generations, stallGenerations=None, targetFitness=targetFitness)
+        result = ga.geneticAlgorithm(tasks, termination=termination, verbose=False, seed=benchmarkSeed, initialisation=strategy)
+        results[f"initialise-{strategy}"] = {
+            'opsPerSecond': 1 / result['elapsedSeconds'],  # Runs to the target per second
+            'generationsToTarget': result['generations'],
+            'secondsToTarget': result['elapsedSeconds'],
+            'reachedTarget': result['bestFitness'] <= targetFitness,
+            'targetFitness': targetFitness,
+            'bestFitness': result['bestFitness'],
+        }
+    return results
+
+##################################################
+
+
+########## Benchmark Main Function ##########
+
+def runBenchmarks(sizes=taskCounts, densities=overlapDensities, maxRunTasks=1000, generations=runGenerations, initialisation=False):
+    results = {}
+    for numTasks in sizes:
+        for densityName, tasksPerDay in densities.items():
+            tasks = generateTasks(numTasks, tasksPerDay)
+            operatorResults = benchmarkOperators(tasks)
+            if numTasks <= maxRunTasks:
+                operatorResults['geneticAlgorithm'] = benchmarkRun(tasks, generations)
+
+            for name, result in operatorResults.items():
+                key = f"{name}/{numTasks}/{densityName}"
+                results[key] = result
+                fitness = f"  fitness {result['bestFitness']:.2f}" if 'bestFitness' in result else ""
+                print(f"{key:>40}: {result['opsPerSecond']:12.1f} ops/s  {result['peakMemoryBytes'] / 1024:10.1f} KiB{fitness}")
+
+            if initialisation and numTasks <= maxRunTasks:
+                for name, result in benchmarkInitialisation(tasks).items():
+                    key = f"{name}/{numTasks}/{densityName}"
+                    results[key] = result
+                    reached = "reached" if result['reachedTarget'] else "missed"
+                    print(f"{key:>40}: {reached} {result['targetFitness']:.2f} after {result['generationsToTarget']} generations in {result['secondsToTarget']:.2f}s")
+    return results
+
+# Function to list the benchmarks that got slower than the baseline by more than the tolerance
+def compareWithBaseline(results, baseline, tolerance=tolerance):
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        ratio = result['opsPerSecond'] / baseline[key]['opsPerSecond']
+        if ratio < 1 - tolerance:
+            regressions.append((key, ratio))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the genetic algorithm operators and whole runs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=taskCounts, help="Task counts to benchmark")
+    parser.add_argument('--max-run-tasks', type=int, default=1000, help="Largest task count for whole genetic algorithm runs")
+    parser.add_argument('--generations', type=int, default=runGenerations, help="Generations in each whole run")
+    parser.add_argument('--baseline', default=baselinePath, help="Baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=tolerance, help="Allowed fractional drop in ops/sec before a regression is reported")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    parser.add_argument('--initialisation', action='store_true', help="Also compare how fast each initialisation strategy reaches a random start's fitness")
+    arguments = parser.parse_args(argv)
+
+    results = runBenchmarks(arguments.sizes, maxRunTasks=arguments.max_run_tasks, generations=arguments.generations, initialisation=arguments.initialisation)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if arguments.save_baseline:
+        with open(arguments.baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline saved to {arguments.baseline}")
+        return 0
+
+    if not os.path.exists(arguments.baseline):
+        return 0
+
+    with open(arguments.baseline) as file:
+        regressions = compareWithBaseline(results, json.load(file), arguments.tolerance)
+    for key, ratio in regressions:
+        print(f"Regression: {key} runs at {ratio:.0%} of the baseline")
+    return 1 if regressions else 0
+
+##################################################
+
+
+if __name__ == "__main__":
+    sys.exit(main())
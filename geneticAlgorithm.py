@@ -1,17 +1,23 @@
 import datetime 
 import random 
 import sqlite3
+import multiprocessing
+import time
+import json
+import io
+import cProfile
+import pstats
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
+from functools import cached_property, lru_cache
+from itertools import accumulate
+from urllib.request import pathname2url
+import numpy as np
 import prettytable
-
-con = sqlite3.connect('data.db')
-cursor = con.cursor()
-cursor.execute("SELECT * FROM planner")
-task = cursor.fetchall()
-con.close()
-
-# Extract tasks from the result set
-tasks = [{'task_name': row[1], 'date': row[3], 'start_time': row[4], 'end_time': row[5], 'priority': row[6]} for row in task]
-
+from plannerDatabase import selectTasks
 
 #Define genetic algorithm parameters 
 
@@ -21,20 +27,483 @@ populationSize = 40
 mutationRate = 0.01
 numGenerations = 5000
 tournamentSize = 10
-convergenceThreshold = 0.01
+convergenceThreshold = 0.01  # Smallest change in best fitness that counts as an improvement
+stallGenerations = 250  # Stop when the best fitness hasn't improved for this many generations
+timeLimit = None  # Stop after this many seconds
+targetFitness = None  # Stop once the best fitness drops to this value, fitness counts penalties so lower is better
+diversityFloor = None  # Stop once the fraction of distinct schedules drops below this
+fitnessCacheSize = 10000
+mutateAllTasks = True  # Shift every unpinned task on each mutation, set to False to only shift tasks at mutationRate
+minBreakDuration = 15  # Minimum break between consecutive tasks in minutes
+collisionFreeMutation = False  # Shift tasks only to free slots that keep the minimum break, see collisionFreeShift
+survivorStrategy = 'plus'  # 'plus' keeps the best of parents and children (mu + lambda), 'comma' replaces the parents with their children (mu, lambda)
+elitism = 1  # Number of best parents that always survive under the 'comma' strategy
+initialisationStrategy = 'random'  # 'random', 'greedy', 'sorted' or 'mixed', see initialiseSchedule
+heuristicFraction = 0.5  # Share of the 'mixed' population built by the greedy and sorted heuristics
+startTimeJitter = 60  # Minutes of random noise added to start times when ordering tasks heuristically
+
+##################################################
+
+########## Task Sources ##########
+
+databasePath = 'data.db'
+
+class DatabaseTaskSource:
+    """
+    Loads tasks from the planner table, only when they are asked for
+
+    Args:
+    path (str): Path to the SQLite database
+    """
+
+    def __init__(self, path=databasePath):
+        self.path = path
+
+    def loadTasks(self, startDate=None, endDate=None):
+        # A short-lived read-only connection, unlike PlannerDatabase this never creates tables or a missing file
+        conn = sqlite3.connect(f"file:{pathname2url(self.path)}?mode=ro", uri=True)
+        try:
+            return selectTasks(conn, startDate, endDate)
+        finally:
+            conn.close()
+
+class ListTaskSource:
+    """
+    Serves tasks from a list that is already in memory, for example tasks read from a file
+
+    Args:
+    tasks (list): List of task dicts
+    """
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+
+    def loadTasks(self, startDate=None, endDate=None):
+        return [task for task in self.tasks
+                if (startDate is None or str(task['date']) >= str(startDate))
+                and (endDate is None or str(task['date']) <= str(endDate))]
+
+# Source used by loadTasks, replace it with setTaskSource
+taskSource = DatabaseTaskSource()
+
+def setTaskSource(source):
+    global taskSource
+    taskSource = source
+
+# Function to load tasks, optionally only those between two dates (inclusive)
+def loadTasks(startDate=None, endDate=None):
+    return taskSource.loadTasks(startDate, endDate)
+
+def __getattr__(name):
+    # The module used to load every task into `tasks` on import, keep that name working but load it lazily
+    if name == 'tasks':
+        return loadTasks()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+##################################################
+
+########## Compiled Schedule Representation ##########
+
+# Tasks are parsed once into a shared, read-only task table so the genetic algorithm never has to
+# touch "%H:%M" strings inside its main loop. Each schedule only stores which task sits at each
+# position along with its start and end time in minutes since midnight
+minutesPerDay = 24 * 60
+
+# Function to convert a "%H:%M" string into minutes since midnight
+def timeToMinutes(timeString):
+    hours, minutes = str(timeString).split(":")
+    return int(hours) * 60 + int(minutes)
+
+# Function to convert minutes since midnight back into a "%H:%M" string
+def minutesToTime(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+class CompiledTasks:
+    """
+    Task table compiled from the planner task dicts, shared by every schedule
+
+    Args:
+    tasks (list): List of task dicts with task_name, date, start_time, end_time and priority
+
+    Attributes:
+    taskNames (list): Task names by task index
+    priorities (list): Original priority values by task index
+    priorityCodes (array): Integer priorities by task index, text priorities are stored as 0
+    dateOrdinals (array): Task dates as ordinals by task index
+    startTimes (array): Planned start times in minutes by task index
+    endTimes (array): Planned end times in minutes by task index
+    dates (dict): Original date values keyed by date ordinal
+    """
+
+    def __init__(self, tasks):
+        self.taskNames = []
+        self.priorities = []
+        self.priorityCodes = array('i')
+        self.dateOrdinals = array('i')
+        self.startTimes = array('i')
+        self.endTimes = array('i')
+        self.dates = {}
+
+        for task in tasks:
+            dateOrdinal = datetime.date.fromisoformat(str(task['date'])).toordinal()
+            self.dates.setdefault(dateOrdinal, task['date'])
+
+            # Priorities edited through the UI can be stored as text, these are never pinned
+            priority = task['priority']
+
+            self.taskNames.append(task['task_name'])
+            self.priorities.append(priority)
+            self.priorityCodes.append(priority if isinstance(priority, int) else 0)
+            self.dateOrdinals.append(dateOrdinal)
+            self.startTimes.append(timeToMinutes(task['start_time']))
+            self.endTimes.append(timeToMinutes(task['end_time']))
+
+        self.dateArray = np.array(self.dateOrdinals, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.taskNames)
+
+    def schedule(self, order):
+        # Build a schedule with the tasks in the given order at their planned times
+        return Schedule(self, array('i', order),
+                        array('i', [self.startTimes[taskIndex] for taskIndex in order]),
+                        array('i', [self.endTimes[taskIndex] for taskIndex in order]))
+
+    def decode(self, schedule):
+        # Convert a schedule back into the task dict form used by the UI
+        return [{
+            'task_name': self.taskNames[taskIndex],
+            'date': self.dates[self.dateOrdinals[taskIndex]],
+            'start_time': minutesToTime(startTime),
+            'end_time': minutesToTime(endTime),
+            'priority': self.priorities[taskIndex],
+        } for taskIndex, startTime, endTime in zip(schedule.taskIndexes, schedule.startTimes, schedule.endTimes)]
+
+class Schedule:
+    """
+    One individual in the population: the task at each position with its start and end time
+
+    Args:
+    tasks (CompiledTasks): Shared task table that the task indexes refer to
+    taskIndexes (array): Task index at each position
+    startTimes (array): Start time in minutes at each position
+    endTimes (array): End time in minutes at each position
+    origin (Schedule): Schedule this one was bred from, if any
+
+    A schedule owns its arrays, so changing one never affects another schedule
+    """
+
+    __slots__ = ('tasks', 'taskIndexes', 'startTimes', 'endTimes', 'origin')
+
+    def __init__(self, tasks, taskIndexes, startTimes, endTimes, origin=None):
+        self.tasks = tasks
+        self.taskIndexes = taskIndexes
+        self.startTimes = startTimes
+        self.endTimes = endTimes
+        self.origin = origin
+
+    def __len__(self):
+        return len(self.taskIndexes)
+
+    def dates(self):
+        dateOrdinals = self.tasks.dateOrdinals
+        return [dateOrdinals[taskIndex] for taskIndex in self.taskIndexes]
+
+    def genes(self):
+        # The arrays that make up the schedule, without the shared task table
+        return self.taskIndexes, self.startTimes, self.endTimes
+
+    def copy(self, length=None):
+        return Schedule(self.tasks, self.taskIndexes[:length], self.startTimes[:length], self.endTimes[:length], origin=self)
+
+    def splice(self, other, start, stop):
+        # New schedule with this schedule's genes, except positions start to stop which come from other
+        return Schedule(
+            self.tasks,
+            self.taskIndexes[:start] + other.taskIndexes[start:stop] + self.taskIndexes[stop:],
+            self.startTimes[:start] + other.startTimes[start:stop] + self.startTimes[stop:],
+            self.endTimes[:start] + other.endTimes[start:stop] + self.endTimes[stop:],
+            origin=self,
+        )
+
+    def setGene(self, position, other, otherPosition):
+        self.taskIndexes[position] = other.taskIndexes[otherPosition]
+        self.startTimes[position] = other.startTimes[otherPosition]
+        self.endTimes[position] = other.endTimes[otherPosition]
+
+##################################################
+
+########## Time-Slot Occupancy ##########
+
+# Times are multiples of 5 minutes, so a day is 288 slots and the slots taken on a date fit in the bits of one int.
+# Overlap, free gap and break checks then become a few shifts, ANDs and ORs instead of comparisons against every task
+slotMinutes = 5
+slotsPerDay = minutesPerDay // slotMinutes
+daySlots = (1 << slotsPerDay) - 1
+
+# Function to get the bits of slots startSlot up to (not including) endSlot
+def slotRange(startSlot, endSlot):
+    if endSlot <= startSlot:
+        return 0
+    return ((1 << (endSlot - startSlot)) - 1) << startSlot
+
+# Function to get the slots a task covers, a task that wraps around midnight covers the end and the start of the day.
+# A time between two slot boundaries takes the whole slot
+def slotMask(startTime, endTime):
+    startSlot = startTime // slotMinutes
+    endSlot = -(-endTime // slotMinutes)
+    if endTime < startTime:
+        return slotRange(startSlot, slotsPerDay) | slotRange(0, endSlot)
+    return slotRange(startSlot, endSlot)
+
+# Function to widen the slots of a mask by padding slots on each side, within the day
+def padSlots(mask, padding):
+    padded = mask
+    for shift in range(1, padding + 1):
+        padded |= mask << shift | mask >> shift
+    return padded & daySlots
+
+class OccupancyBitmap:
+    """
+    Slots taken by the tasks on each date, one int per date with bit i set when slot i is taken
+
+    Args:
+    schedule (Schedule): Schedule whose tasks fill the bitmap, or None to start empty
+
+    Tasks can overlap, so every date keeps a bit-sliced count of the tasks in each slot:
+    bit i of planes[k] is bit k of the count for slot i. Adding or removing a task is a ripple carry
+    over a few ints, and removing one task leaves the slots it shares with other tasks taken
+    """
+
+    def __init__(self, schedule=None):
+        self.planes = {}  # date ordinal -> list of count bit planes
+        if schedule is not None:
+            for startTime, endTime, date in zip(schedule.startTimes, schedule.endTimes, schedule.dates()):
+                self.add(date, startTime, endTime)
+
+    def add(self, date, startTime, endTime):
+        planes = self.planes.setdefault(date, [])
+        carry = slotMask(startTime, endTime)
+        for k, plane in enumerate(planes):
+            planes[k] = plane ^ carry
+            carry &= plane
+            if not carry:
+                return
+        if carry:
+            planes.append(carry)
+
+    def remove(self, date, startTime, endTime):
+        # The task has to be in the bitmap, otherwise the counts of its slots go wrong
+        planes = self.planes[date]
+        borrow = slotMask(startTime, endTime)
+        for k, plane in enumerate(planes):
+            planes[k] = plane ^ borrow
+            borrow &= ~plane
+            if not borrow:
+                break
+        while planes and not planes[-1]:
+            planes.pop()
+
+    def occupied(self, date):
+        occupied = 0
+        for plane in self.planes.get(date, ()):
+            occupied |= plane
+        return occupied
+
+    def overlaps(self, date, startTime, endTime):
+        # Whether a task that isn't in the bitmap would share a slot with one that is
+        return bool(self.occupied(date) & slotMask(startTime, endTime))
+
+    def tooClose(self, date, startTime, endTime, minBreakDuration=minBreakDuration):
+        # Whether a task that isn't in the bitmap would be closer than the minimum break to one that is
+        return bool(self.occupied(date) & padSlots(slotMask(startTime, endTime), minBreakDuration // slotMinutes))
+
+    def freeGaps(self, date):
+        # Free (startTime, endTime) runs of the date in minutes, in order
+        free = ~self.occupied(date) & daySlots
+        gaps = []
+        while free:
+            startSlot = (free & -free).bit_length() - 1
+            run = free >> startSlot
+            length = (run ^ (run + 1)).bit_length() - 1
+            gaps.append((startSlot * slotMinutes, (startSlot + length) * slotMinutes))
+            free &= ~slotRange(startSlot, startSlot + length)
+        return gaps
+
+    def freeStarts(self, date, duration, minBreakDuration=minBreakDuration):
+        # Slots where a task of the given length can start and still end before midnight,
+        # overlapping a task or coming closer than the minimum break to one
+        blocked = padSlots(self.occupied(date), minBreakDuration // slotMinutes)
+
+        # Bit s of covered is set when any of the slots s to s + length - 1 is blocked,
+        # built by doubling the covered span so it takes log(length) steps
+        length = max(-(-duration // slotMinutes), 1)
+        covered = blocked
+        span = 1
+        while span < length:
+            step = min(span, length - span)
+            covered |= covered >> step
+            span += step
+        return ~covered & slotRange(0, slotsPerDay - length)
 
 ##################################################
 
 ########## Genetic Algorithm Initalisation ##########
 
-# Function to initialise a random schedule 
-def initialiseSchedule(tasks, populationSize):
+# Function to order tasks by date and planned start time, with up to jitter minutes of noise on the start times
+def jitteredOrder(tasks, jitter, rng=random):
+    return sorted(range(len(tasks)), key=lambda taskIndex: (tasks.dateOrdinals[taskIndex], tasks.startTimes[taskIndex] + rng.uniform(-jitter, jitter)))
+
+# Function to find the earliest start at or after startTime that keeps a minimum break from every busy interval
+def earliestStart(busy, startTime, duration, minBreakDuration=minBreakDuration):
+    # busy holds the (start, end) intervals already placed on the date, sorted by start
+    for busyStart, busyEnd in busy:
+        if startTime >= busyEnd + minBreakDuration:
+            continue
+        if startTime + duration + minBreakDuration <= busyStart:
+            break
+        startTime = busyEnd + minBreakDuration
+    return startTime
+
+# Function to pack tasks greedily: each task is moved to the earliest time from its planned start
+# that doesn't overlap the tasks already placed and leaves the 15 minute break around them
+def greedySchedule(tasks, order):
+    busyByDate = {}
+
+    # Everyday events are never moved by mutation, so they are placed first at their planned times
+    placed = {}
+    for taskIndex in order:
+        if tasks.priorityCodes[taskIndex] == 4:
+            placed[taskIndex] = (tasks.startTimes[taskIndex], tasks.endTimes[taskIndex])
+            insort(busyByDate.setdefault(tasks.dateOrdinals[taskIndex], []), placed[taskIndex])
+
+    for taskIndex in order:
+        if taskIndex in placed:
+            continue
+        busy = busyByDate.setdefault(tasks.dateOrdinals[taskIndex], [])
+        startTime = tasks.startTimes[taskIndex]
+        duration = (tasks.endTimes[taskIndex] - startTime) % minutesPerDay
+        packedStart = earliestStart(busy, startTime, duration)
+
+        # A task that no longer fits before midnight goes in the first gap of the day,
+        # or keeps its planned time when the day is full
+        if packedStart + duration >= minutesPerDay:
+            packedStart = earliestStart(busy, 0, duration)
+        if packedStart + duration < minutesPerDay:
+            startTime = packedStart
+        placed[taskIndex] = (startTime, startTime + duration)
+        insort(busy, placed[taskIndex])
+
+    # Order the chromosome by placed start time, so each break is checked against the task before it
+    packedOrder = sorted(order, key=lambda taskIndex: (tasks.dateOrdinals[taskIndex], placed[taskIndex]))
+    return Schedule(tasks, array('i', packedOrder),
+                    array('i', [placed[taskIndex][0] for taskIndex in packedOrder]),
+                    array('i', [placed[taskIndex][1] % minutesPerDay for taskIndex in packedOrder]))
+
+# Function to initialise a population of schedules
+def initialiseSchedule(tasks, populationSize, rng=random, strategy=initialisationStrategy):
+    """
+    Build the starting population
+
+    Args:
+    tasks (CompiledTasks): Tasks to schedule
+    populationSize (int): Number of schedules
+    rng (Random): Source of randomness
+    strategy (str): 'random' shuffles the tasks at their planned times,
+    'greedy' packs jittered task orders with greedySchedule,
+    'sorted' orders the tasks by jittered start time at their planned times,
+    'mixed' builds heuristicFraction of the population with the greedy and sorted heuristics and shuffles the rest
+
+    Returns:
+    list: The population of schedules
+
+    The heuristics suit days with free time: with 8 tasks a day greedy and mixed start at the fitness a random start
+    needs 170-200 generations to reach. On full days (48 tasks a day) they converge early and end worse than a random
+    start after 200 generations, which is why 'random' stays the default
+    """
+
+    if strategy not in ('random', 'greedy', 'sorted', 'mixed'):
+        raise ValueError(f"Unknown initialisation strategy: {strategy}")
+
     population = []
-    # Create a population of schedules by shuffling the tasks
-    for _ in range(populationSize):
+    numHeuristic = {'random': 0, 'greedy': populationSize, 'sorted': populationSize, 'mixed': round(populationSize * heuristicFraction)}[strategy]
+
+    # The first heuristic schedule is built without jitter, the rest are varied so the population stays diverse
+    for i in range(numHeuristic):
+        order = jitteredOrder(tasks, startTimeJitter if i else 0, rng)
+        useGreedy = strategy == 'greedy' or (strategy == 'mixed' and i % 2 == 0)
+        population.append(greedySchedule(tasks, order) if useGreedy else tasks.schedule(order))
+
+    # Create the rest of the population by shuffling the tasks
+    for _ in range(populationSize - numHeuristic):
          # Create a schedule by shuffling the tasks and ensuring priorities are respected
-         shuffledTasks = random.sample(tasks, len(tasks))
-         population.append(shuffledTasks)
+         shuffledTasks = rng.sample(range(len(tasks)), len(tasks))
+         population.append(tasks.schedule(shuffledTasks))
+    return population
+
+##################################################
+
+
+########## Genetic Algorithm Warm Start ##########
+
+# Saved populations describe each gene by task name and priority rather than task index,
+# so they can be matched against a day whose tasks have since been added, removed or reordered
+
+# Function to convert a population into plain lists that can be stored as JSON
+def exportPopulation(population):
+    if not population:
+        return []
+    tasks = population[0].tasks
+    return [[[tasks.taskNames[taskIndex], tasks.priorities[taskIndex], startTime, endTime]
+             for taskIndex, startTime, endTime in zip(schedule.taskIndexes, schedule.startTimes, schedule.endTimes)]
+            for schedule in population]
+
+# Function to rebuild an exported population against the current tasks
+def importPopulation(tasks, savedPopulation):
+    """
+    Map a saved population onto the current tasks
+
+    Args:
+    tasks (CompiledTasks): The tasks to schedule now
+    savedPopulation (list): Population from exportPopulation
+
+    Returns:
+    list: One schedule per saved schedule. Genes of tasks that were removed are dropped,
+    tasks that were added are appended at their planned times
+
+    Each gene keeps its saved start time but takes its duration from the current task, so a task
+    whose times were edited since keeps its new length. Everyday events (priority 4) are never moved,
+    so they are placed at their current planned times
+    """
+
+    indexesByKey = {}
+    for taskIndex, (taskName, priority) in enumerate(zip(tasks.taskNames, tasks.priorities)):
+        indexesByKey.setdefault((taskName, priority), []).append(taskIndex)
+
+    population = []
+    for savedSchedule in savedPopulation:
+        # Tasks can share a name, each saved gene claims the next unclaimed task with its name and priority
+        available = {key: deque(indexes) for key, indexes in indexesByKey.items()}
+        taskIndexes, startTimes, endTimes = array('i'), array('i'), array('i')
+        for taskName, priority, startTime, endTime in savedSchedule:
+            indexes = available.get((taskName, priority))
+            if not indexes:
+                continue
+            taskIndex = indexes.popleft()
+            plannedStartTime, plannedEndTime = tasks.startTimes[taskIndex], tasks.endTimes[taskIndex]
+            if tasks.priorityCodes[taskIndex] == 4:
+                startTime = plannedStartTime
+            taskIndexes.append(taskIndex)
+            startTimes.append(startTime)
+            endTimes.append((startTime + plannedEndTime - plannedStartTime) % minutesPerDay)
+
+        for indexes in available.values():
+            for taskIndex in indexes:
+                taskIndexes.append(taskIndex)
+                startTimes.append(tasks.startTimes[taskIndex])
+                endTimes.append(tasks.endTimes[taskIndex])
+
+        population.append(Schedule(tasks, taskIndexes, startTimes, endTimes))
     return population
 
 ##################################################
@@ -42,22 +511,24 @@ def initialiseSchedule(tasks, populationSize):
 
 ########## Genetic Algorithm Evaluation Operator ##########
 
-# Function to evaluate fitness of a schedule
+# Function to evaluate fitness of a schedule, overlaps and short breaks add to it so the lowest score is best
 def evaluateSchedule(schedule):
     fitness = 0
+    startTimes = schedule.startTimes
+    endTimes = schedule.endTimes
+    dates = schedule.dates()
 
-    for i, task in enumerate(schedule):
-        priority = task['priority']
-        date = task['date']
-        startTime = task['start_time']
-        endTime = task['end_time']
+    for i in range(len(schedule)):
+        date = dates[i]
+        startTime = startTimes[i]
+        endTime = endTimes[i]
 
         # Constraint 1: Avoid overlapping tasks
-        for otherTask in schedule[i + 1:]:
-            otherStartTime = otherTask['start_time']
-            otherEndTime = otherTask['end_time']
+        for j in range(i + 1, len(schedule)):
+            otherStartTime = startTimes[j]
+            otherEndTime = endTimes[j]
 
-            if date == otherTask['date']:
+            if date == dates[j]:
                 if not (endTime <= otherStartTime or startTime >= otherEndTime):
                     fitness += 0.1  # Penalize for overlapping tasks
                 else:
@@ -65,10 +536,7 @@ def evaluateSchedule(schedule):
 
         # Constraint 2: Minimum Break Duration
         if i > 0:
-            prevEndTime = datetime.datetime.strptime(schedule[i - 1]['end_time'], "%H:%M")
-            currentStartTime = datetime.datetime.strptime(startTime, "%H:%M")
-            breakDuration = (currentStartTime - prevEndTime).total_seconds() / 60
-            minBreakDuration = 15  # Minimum break duration in minutes
+            breakDuration = startTime - endTimes[i - 1]
             if breakDuration < minBreakDuration:
                 fitness += 0.1  # Penalize for insufficient break duration
             else:
@@ -77,55 +545,781 @@ def evaluateSchedule(schedule):
 
 ##################################################
 
-########## Genetic Algorithm Selection Operators ##########
+########## Genetic Algorithm Sweep-Line Evaluation ##########
+
+# Function to count overlapping and non-overlapping pairs among the tasks of one date
+def countOverlaps(startTimes, endTimes):
+    numTasks = len(startTimes)
+    if numTasks < 2:
+        return 0, 0
+
+    # Two tasks don't overlap when one of them ends before the other starts.
+    # Count the ordered pairs (p, q) where p ends before q starts with a single sweep over sorted start times
+    sortedStartTimes = sorted(startTimes)
+    endsBefore = 0
+    for endTime in endTimes:
+        endsBefore += numTasks - bisect_left(sortedStartTimes, endTime)
+
+    # A task only counts itself when it has zero length or wraps around midnight
+    wrapped = sum(1 for startTime, endTime in zip(startTimes, endTimes) if endTime <= startTime)
+    endsBefore -= wrapped
+
+    # Pairs where each task ends before the other starts were counted twice above,
+    # which is only possible when one of them has zero length or wraps around midnight
+    bothEndBefore = countMutuallyEndBefore(startTimes, endTimes) if wrapped else 0
+
+    totalPairs = numTasks * (numTasks - 1) // 2
+    nonOverlapping = endsBefore - bothEndBefore
+    return totalPairs - nonOverlapping, nonOverlapping
+
+# Function to count the pairs of tasks where each one ends before the other starts
+def countMutuallyEndBefore(startTimes, endTimes):
+    numTasks = len(startTimes)
+    endValues = sorted(set(endTimes))
+    tree = [0] * (len(endValues) + 1)
+
+    # Insert tasks by descending start time into a Fenwick tree keyed on end time,
+    # then for each task count the inserted tasks that end before it starts
+    byStartTime = sorted(range(numTasks), key=startTimes.__getitem__, reverse=True)
+    byEndTime = sorted(range(numTasks), key=endTimes.__getitem__, reverse=True)
+
+    inserted = 0
+    orderedPairs = 0
+    for p in byEndTime:
+        while inserted < numTasks and startTimes[byStartTime[inserted]] >= endTimes[p]:
+            position = bisect_left(endValues, endTimes[byStartTime[inserted]]) + 1
+            while position < len(tree):
+                tree[position] += 1
+                position += position & -position
+            inserted += 1
+
+        position = bisect_right(endValues, startTimes[p])
+        while position > 0:
+            orderedPairs += tree[position]
+            position -= position & -position
+
+    # Remove the tasks that matched themselves, every remaining pair was seen from both sides
+    selfPairs = sum(1 for startTime, endTime in zip(startTimes, endTimes) if endTime <= startTime)
+    return (orderedPairs - selfPairs) // 2
+
+# Function to count overlapping and non-overlapping pairs of a whole schedule, only tasks on the same date are compared
+def countOverlapsByDate(startTimes, endTimes, dates):
+    tasksByDate = {}
+    for startTime, endTime, date in zip(startTimes, endTimes, dates):
+        dateStartTimes, dateEndTimes = tasksByDate.setdefault(date, ([], []))
+        dateStartTimes.append(startTime)
+        dateEndTimes.append(endTime)
+
+    totalOverlapping = 0
+    totalNonOverlapping = 0
+    for dateStartTimes, dateEndTimes in tasksByDate.values():
+        overlapping, nonOverlapping = countOverlaps(dateStartTimes, dateEndTimes)
+        totalOverlapping += overlapping
+        totalNonOverlapping += nonOverlapping
+    return totalOverlapping, totalNonOverlapping
+
+# Function to convert constraint counts into a fitness value
+def fitnessFromCounts(penalties, awards):
+    # Each penalty adds 0.1 and each award removes 0.01, computed in one step
+    # so the result doesn't depend on the order the constraints were checked
+    return (10 * penalties - awards) / 100
+
+# Function to evaluate fitness of a schedule in O(n log n) using a sweep over each date
+def evaluateScheduleSweep(schedule):
+    return sweepFitness(schedule.startTimes, schedule.endTimes, schedule.dates())
+
+def sweepFitness(startTimes, endTimes, dates):
+    # Constraint 1: Avoid overlapping tasks (only tasks on the same date are compared)
+    penalties, awards = countOverlapsByDate(startTimes, endTimes, dates)
+
+    # Constraint 2: Minimum Break Duration
+    for previousEndTime, startTime in zip(endTimes, startTimes[1:]):
+        if startTime - previousEndTime < minBreakDuration:
+            penalties += 1
+        else:
+            awards += 1
 
-# Function to select parents using tournament selection
-def tournamentSelection(population, fitnessScores, tournamentSize):
-    selectedParents = []
-    for _ in range(len(population)):
-        tournamentContestants = random.sample(range(len(population)), tournamentSize)
-        winnerIndex = max(tournamentContestants, key=lambda idx: fitnessScores[idx])
-        selectedParents.append(population[winnerIndex])
-    return selectedParents
-
-def rouletteWheelSelection(population, fitnessScores):
-    totalFitness = sum(fitnessScores)
-    probabilities = [fitness / totalFitness for fitness in fitnessScores]
-
-    selectedParents = []
-    for _ in range(len(population)):
-        spin = random.uniform(0, 1)
-        cumulativeProbability = 0
-
-        for i, probability in enumerate(probabilities):
-            cumulativeProbability += probability
-            if spin <= cumulativeProbability:
-                selectedParents.append(population[i])
-                break
+    return fitnessFromCounts(penalties, awards)
 
-    return selectedParents
+##################################################
 
-def rankBasedSelection(population, fitnessScores):
-    sortedPopulation = [x for _, x in sorted(zip(fitnessScores, population), key=lambda pair: pair[0], reverse=True)]
-    selectionProbabilities = [((2 * (i + 1)) / (len(population) * (len(population) + 1))) for i in range(len(population))]
+########## Genetic Algorithm Incremental Evaluation ##########
+
+# Function to check whether the break between two consecutive tasks is too short
+def breakTooShort(previousEndTime, startTime):
+    return startTime - previousEndTime < minBreakDuration
+
+class DateIndex:
+    """
+    Sorted start and end times of the tasks on one date, used to count overlaps for a single task
+    """
+
+    def __init__(self):
+        self.startTimes = []
+        self.endTimes = []
+        self.members = {}  # position -> (startTime, endTime)
+        self.wrapped = {}  # Members that have zero length or wrap around midnight
+
+    def add(self, position, startTime, endTime):
+        insort(self.startTimes, startTime)
+        insort(self.endTimes, endTime)
+        self.members[position] = (startTime, endTime)
+        if endTime <= startTime:
+            self.wrapped[position] = (startTime, endTime)
+
+    def copy(self):
+        dateIndex = DateIndex()
+        dateIndex.startTimes = self.startTimes[:]
+        dateIndex.endTimes = self.endTimes[:]
+        dateIndex.members = dict(self.members)
+        dateIndex.wrapped = dict(self.wrapped)
+        return dateIndex
+
+    def remove(self, position, startTime, endTime):
+        del self.startTimes[bisect_left(self.startTimes, startTime)]
+        del self.endTimes[bisect_left(self.endTimes, endTime)]
+        del self.members[position]
+        self.wrapped.pop(position, None)
+
+    def countAgainst(self, startTime, endTime):
+        # Count how many members overlap, and don't overlap, a task that is not itself a member
+        endsBefore = len(self.startTimes) - bisect_left(self.startTimes, endTime)
+        endsBefore += bisect_right(self.endTimes, startTime)
+
+        # Members that both end before the task starts and start after it ends were counted twice.
+        # For a normal task only wrapped members can do that, otherwise every member has to be checked
+        candidates = self.wrapped if startTime < endTime else self.members
+        bothEndBefore = sum(1 for otherStartTime, otherEndTime in candidates.values() if endTime <= otherStartTime and otherEndTime <= startTime)
+
+        nonOverlapping = endsBefore - bothEndBefore
+        return len(self.members) - nonOverlapping, nonOverlapping
+
+class ScheduleState:
+    """
+    Penalty and award counts of a schedule, updated one gene at a time
+
+    Args:
+    schedule (Schedule): Schedule to track
+
+    Attributes:
+    penalties (int): Number of +0.1 constraint violations
+    awards (int): Number of -0.01 satisfied constraints
+    """
+
+    def __init__(self, schedule):
+        self.startTimes = list(schedule.startTimes)
+        self.endTimes = list(schedule.endTimes)
+        self.dates = schedule.dates()
+        self.dateIndexes = {}
+        self.penalties = 0
+        self.awards = 0
 
-    selectedParents = []
-    for _ in range(len(population)):
-        spin = random.uniform(0, 1)
-        cumulativeProbability = 0
+        # Constraint 1: Avoid overlapping tasks
+        for position, (startTime, endTime, date) in enumerate(zip(self.startTimes, self.endTimes, self.dates)):
+            self.dateIndexes.setdefault(date, DateIndex()).add(position, startTime, endTime)
 
-        for i, probability in enumerate(selectionProbabilities):
-            cumulativeProbability += probability
-            if spin <= cumulativeProbability:
-                selectedParents.append(sortedPopulation[i])
-                break
+        for dateIndex in self.dateIndexes.values():
+            members = list(dateIndex.members.values())
+            overlapping, nonOverlapping = countOverlaps([times[0] for times in members], [times[1] for times in members])
+            self.penalties += overlapping
+            self.awards += nonOverlapping
+
+        # Constraint 2: Minimum Break Duration
+        for position in range(1, len(schedule)):
+            self.addBreak(position, 1)
+
+    def __len__(self):
+        return len(self.startTimes)
+
+    def copy(self):
+        state = ScheduleState.__new__(ScheduleState)
+        state.startTimes = self.startTimes[:]
+        state.endTimes = self.endTimes[:]
+        state.dates = self.dates[:]
+        state.dateIndexes = {date: dateIndex.copy() for date, dateIndex in self.dateIndexes.items()}
+        state.penalties = self.penalties
+        state.awards = self.awards
+        return state
+
+    @property
+    def fitness(self):
+        return fitnessFromCounts(self.penalties, self.awards)
+
+    def addBreak(self, position, sign):
+        # Add (sign=1) or remove (sign=-1) the break constraint between a task and the one before it
+        if breakTooShort(self.endTimes[position - 1], self.startTimes[position]):
+            self.penalties += sign
+        else:
+            self.awards += sign
+
+    def setGene(self, position, startTime, endTime, date):
+        # Take the task out, removing its overlap and break contributions
+        dateIndex = self.dateIndexes[self.dates[position]]
+        dateIndex.remove(position, self.startTimes[position], self.endTimes[position])
+        overlapping, nonOverlapping = dateIndex.countAgainst(self.startTimes[position], self.endTimes[position])
+        self.penalties -= overlapping
+        self.awards -= nonOverlapping
+
+        neighbours = [neighbour for neighbour in (position, position + 1) if 0 < neighbour < len(self)]
+        for neighbour in neighbours:
+            self.addBreak(neighbour, -1)
+
+        # Put it back with its new times, adding the new contributions
+        self.startTimes[position] = startTime
+        self.endTimes[position] = endTime
+        self.dates[position] = date
+
+        dateIndex = self.dateIndexes.setdefault(date, DateIndex())
+        overlapping, nonOverlapping = dateIndex.countAgainst(startTime, endTime)
+        self.penalties += overlapping
+        self.awards += nonOverlapping
+        dateIndex.add(position, startTime, endTime)
+
+        for neighbour in neighbours:
+            self.addBreak(neighbour, 1)
+
+    def changedPositions(self, schedule):
+        # Positions whose genes differ from the state
+        return [position for position, (startTime, endTime, date) in enumerate(zip(schedule.startTimes, schedule.endTimes, schedule.dates()))
+                if startTime != self.startTimes[position] or endTime != self.endTimes[position] or date != self.dates[position]]
+
+    def update(self, schedule, positions=None):
+        # Apply the genes that changed since the state was last updated, returning their positions
+        if positions is None:
+            positions = self.changedPositions(schedule)
+
+        dateOrdinals = schedule.tasks.dateOrdinals
+        for position in positions:
+            self.setGene(position, schedule.startTimes[position], schedule.endTimes[position], dateOrdinals[schedule.taskIndexes[position]])
+
+        return positions
+
+class IncrementalEvaluator:
+    """
+    Evaluates schedules by updating a saved ScheduleState with only the genes that changed.
+    A new schedule starts from a copy of the state of the schedule it was bred from.
+    Each state holds O(n) lists, so call retain with the survivors after each generation
+
+    Args:
+    maxSize (int): Maximum number of schedule states to keep, enough for one generation of parents and children
+    rebuildFraction (float): Rebuild a state from scratch when more than this fraction of its genes changed
+    """
+
+    def __init__(self, maxSize=2 * populationSize, rebuildFraction=0.25):
+        self.maxSize = maxSize
+        self.rebuildFraction = rebuildFraction
+        self.states = OrderedDict()  # id(schedule) -> (schedule, state)
+
+    def savedState(self, schedule):
+        entry = self.states.get(id(schedule))
+        if entry and entry[0] is schedule and len(entry[1]) == len(schedule):
+            self.states.move_to_end(id(schedule))
+            return entry[1]
+        return None
+
+    def evaluate(self, schedule):
+        state = self.savedState(schedule)
+        if state is None and schedule.origin is not None:
+            originState = self.savedState(schedule.origin)
+            state = originState.copy() if originState else None
+
+        # The origin is only needed once, dropping it stops whole family trees being kept alive
+        schedule.origin = None
+
+        if state is not None:
+            changed = state.changedPositions(schedule)
+            if len(changed) > self.rebuildFraction * len(schedule):
+                state = None
+            else:
+                state.update(schedule, changed)
+
+        if state is None:
+            state = ScheduleState(schedule)
+
+        # Keep a reference to the schedule so its id can't be reused while the state is stored
+        self.states[id(schedule)] = (schedule, state)
+        self.states.move_to_end(id(schedule))
+        while len(self.states) > self.maxSize:
+            self.states.popitem(last=False)
+        return state.fitness
+
+    def evaluatePopulation(self, population):
+        return [self.evaluate(schedule) for schedule in population]
+
+    # Function to drop the states of schedules that are no longer in the population,
+    # only the current population is ever used as the origin of new children
+    def retain(self, population):
+        live = {id(schedule) for schedule in population}
+        for key in [key for key in self.states if key not in live]:
+            del self.states[key]
+
+##################################################
+
+########## Genetic Algorithm Batch Evaluation ##########
+
+# Maximum number of fitness terms held in memory at once when scoring a population
+batchEvaluationBudget = 2 ** 22
+
+# Schedules with more tasks than this are scored with the sweep-line evaluator instead of
+# the quadratic batch evaluator, the two agree to within floating point rounding.
+# Scoring 80 schedules, the sweep line is faster from about 45 tasks with 8 a day and about 65 with 48 a day
+sweepLineTaskThreshold = 50
+
+@lru_cache(maxsize=None)
+def fitnessTermLayout(numTasks):
+    # evaluateSchedule adds its +0.1 / -0.01 terms in a fixed order: for every task the overlap
+    # checks against each later task, followed by the break check against the previous task.
+    # Work out where each term sits in that order so the batch sum follows exactly the same order
+    pairPositions = []
+    breakPositions = []
+    position = 0
+    for i in range(numTasks):
+        numPairs = numTasks - i - 1
+        pairPositions.extend(range(position, position + numPairs))
+        position += numPairs
+        if i > 0:
+            breakPositions.append(position)
+            position += 1
+    return np.array(pairPositions, dtype=np.intp), np.array(breakPositions, dtype=np.intp), position
+
+# Function to evaluate the fitness of every schedule in a (population x tasks) matrix
+def evaluateScheduleMatrix(startTimes, endTimes, dates):
+    startTimes = np.asarray(startTimes)
+    endTimes = np.asarray(endTimes)
+    dates = np.asarray(dates)
+    numSchedules, numTasks = startTimes.shape
+
+    pairPositions, breakPositions, numTerms = fitnessTermLayout(numTasks)
+    fitness = np.zeros(numSchedules)
+    if numTerms == 0:
+        return fitness
+
+    first, second = np.triu_indices(numTasks, 1)
+
+    # Score the population in chunks so large populations don't exhaust memory
+    chunkSize = max(1, batchEvaluationBudget // numTerms)
+    for chunkStart in range(0, numSchedules, chunkSize):
+        chunk = slice(chunkStart, chunkStart + chunkSize)
+        start = startTimes[chunk]
+        end = endTimes[chunk]
+        date = dates[chunk]
+
+        # Constraint 1: Avoid overlapping tasks (only tasks on the same date are compared)
+        overlapping = ~((end[:, first] <= start[:, second]) | (start[:, first] >= end[:, second]))
+        sameDate = date[:, first] == date[:, second]
+        pairTerms = np.where(sameDate, np.where(overlapping, 0.1, -0.01), 0.0)
+
+        # Constraint 2: Minimum Break Duration
+        breakDuration = start[:, 1:] - end[:, :-1]
+        breakTerms = np.where(breakDuration < minBreakDuration, 0.1, -0.01)
+
+        terms = np.zeros((len(start), numTerms))
+        terms[:, pairPositions] = pairTerms
+        terms[:, breakPositions] = breakTerms
+
+        # cumsum adds sequentially, which keeps the result identical to evaluateSchedule
+        fitness[chunk] = np.cumsum(terms, axis=1)[:, -1]
+
+    return fitness
+
+# Function to evaluate (population x tasks) time matrices with the evaluator suited to the schedule size
+def evaluateTimeMatrix(startTimes, endTimes, dates):
+    if startTimes.shape[1] > sweepLineTaskThreshold:
+        return [sweepFitness(*schedule) for schedule in zip(startTimes.tolist(), endTimes.tolist(), dates.tolist())]
+
+    return evaluateScheduleMatrix(startTimes, endTimes, dates).tolist()
 
-    return selectedParents
+# Function to convert a population of schedules into (population x tasks) task index, start and end time matrices
+def populationMatrices(population):
+    taskIndexes = np.array([schedule.taskIndexes for schedule in population], dtype=np.int64)
+    startTimes = np.array([schedule.startTimes for schedule in population], dtype=np.int64)
+    endTimes = np.array([schedule.endTimes for schedule in population], dtype=np.int64)
+    return taskIndexes, startTimes, endTimes
+
+# Function to evaluate the fitness of a whole population of schedules in one pass
+def evaluatePopulation(population):
+    if not population:
+        return []
+
+    taskIndexes, startTimes, endTimes = populationMatrices(population)
+    return evaluateTimeMatrix(startTimes, endTimes, population[0].tasks.dateArray[taskIndexes])
+
+##################################################
+
+########## Genetic Algorithm Constraint Pipeline ##########
+
+# Every constraint scores a whole population at once from the same (population x tasks) matrices.
+# A constraint returns, for each schedule, how many times it was violated and how many times it was met,
+# and the pipeline turns those counts into fitness with the weights each constraint was registered with.
+# The constraints are not fused into a single pass: each one makes its own vectorised pass over the shared
+# arrays, so its counts and its share of the evaluation time can be reported on their own.
+# This costs nothing measurable, scoring 80 schedules of 20-1000 tasks takes 0.5-0.9 times as long as the
+# single-pass evaluatePopulation, which has to add its terms in evaluateSchedule's order
+
+class ConstraintBatch:
+    """
+    Population matrices shared by every constraint in one pipeline pass
+
+    Args:
+    tasks (CompiledTasks): Task table the task indexes refer to
+    taskIndexes (array): (population x tasks) task index matrix
+    startTimes (array): (population x tasks) start time matrix
+    endTimes (array): (population x tasks) end time matrix
+
+    Arrays used by more than one constraint are cached properties, so they are built once per pass
+    """
+
+    def __init__(self, tasks, taskIndexes, startTimes, endTimes):
+        self.tasks = tasks
+        self.taskIndexes = taskIndexes
+        self.startTimes = startTimes
+        self.endTimes = endTimes
+        self.dates = tasks.dateArray[taskIndexes]
+
+    def __len__(self):
+        return len(self.startTimes)
+
+    @cached_property
+    def priorities(self):
+        return np.asarray(self.tasks.priorityCodes, dtype=np.int64)[self.taskIndexes]
+
+    @cached_property
+    def plannedStartTimes(self):
+        return np.asarray(self.tasks.startTimes, dtype=np.int64)[self.taskIndexes]
+
+    @cached_property
+    def plannedEndTimes(self):
+        return np.asarray(self.tasks.endTimes, dtype=np.int64)[self.taskIndexes]
+
+class OverlapConstraint:
+    """
+    Constraint 1 of evaluateSchedule: every pair of tasks on the same date should not overlap
+    """
+
+    name = 'overlap'
+
+    def counts(self, batch):
+        numSchedules, numTasks = batch.startTimes.shape
+
+        # Large schedules are counted with the sweep line, one schedule and date at a time in Python,
+        # because the pairwise matrices would grow with the square of the number of tasks
+        if numTasks > sweepLineTaskThreshold:
+            counts = [countOverlapsByDate(*times) for times in zip(batch.startTimes.tolist(), batch.endTimes.tolist(), batch.dates.tolist())]
+            violations, satisfied = np.array(counts, dtype=np.int64).reshape(numSchedules, 2).T
+            return violations, satisfied
+
+        first, second = np.triu_indices(numTasks, 1)
+        start = batch.startTimes
+        end = batch.endTimes
+        overlapping = ~((end[:, first] <= start[:, second]) | (start[:, first] >= end[:, second]))
+        sameDate = batch.dates[:, first] == batch.dates[:, second]
+        return (overlapping & sameDate).sum(axis=1), (~overlapping & sameDate).sum(axis=1)
+
+class BreakConstraint:
+    """
+    Constraint 2 of evaluateSchedule: each task should start at least minBreakDuration minutes after the task before it
+
+    Args:
+    minBreakDuration (int): Minimum break in minutes
+    """
+
+    name = 'break'
+
+    def __init__(self, minBreakDuration=minBreakDuration):
+        self.minBreakDuration = minBreakDuration
+
+    def counts(self, batch):
+        tooShort = batch.startTimes[:, 1:] - batch.endTimes[:, :-1] < self.minBreakDuration
+        return tooShort.sum(axis=1), (~tooShort).sum(axis=1)
+
+class PinnedConstraint:
+    """
+    Everyday events (priority 4) should stay at their planned start and end times
+    """
+
+    name = 'pinned'
+
+    def counts(self, batch):
+        pinned = batch.priorities == 4
+        moved = (batch.startTimes != batch.plannedStartTimes) | (batch.endTimes != batch.plannedEndTimes)
+        return (pinned & moved).sum(axis=1), (pinned & ~moved).sum(axis=1)
+
+class WorkingHoursConstraint:
+    """
+    Tasks should start and end between startTime and endTime without wrapping around midnight
+
+    Args:
+    startTime (str): Start of the working day as "%H:%M"
+    endTime (str): End of the working day as "%H:%M"
+    """
+
+    name = 'workingHours'
+
+    def __init__(self, startTime='06:00', endTime='22:00'):
+        self.startTime = timeToMinutes(startTime)
+        self.endTime = timeToMinutes(endTime)
+
+    def counts(self, batch):
+        start = batch.startTimes
+        end = batch.endTimes
+        outside = (start < self.startTime) | (end > self.endTime) | (end < start)
+        return outside.sum(axis=1), (~outside).sum(axis=1)
+
+class ConstraintPipeline:
+    """
+    Fitness built from registered constraints, scored with one vectorised pass per constraint over arrays shared by all of them
+
+    Attributes:
+    schedules (int): Number of schedules evaluated
+    totals (dict): Per constraint name: violations, penalty, awards and seconds summed over every evaluation
+
+    Fitness is the sum over the constraints of penalty * times violated - award * times met,
+    the same way evaluateSchedule adds its penalties and removes its awards.
+    With only the overlap and break constraints at their default weights this is the fitness of
+    evaluateSchedule, to within floating point rounding
+    """
+
+    def __init__(self):
+        self.constraints = []  # (constraint, penalty, award) in the order they were registered
+        self.schedules = 0
+        self.totals = {}
+
+    # Function to add a constraint, returns the pipeline so registrations can be chained
+    def register(self, constraint, penalty=0.1, award=0.01):
+        if constraint.name in self.totals:
+            raise ValueError(f"A constraint named {constraint.name} is already registered")
+        self.constraints.append((constraint, penalty, award))
+        self.totals[constraint.name] = {'violations': 0, 'penalty': 0.0, 'awards': 0.0, 'seconds': 0.0}
+        return self
+
+    def evaluateMatrices(self, tasks, taskIndexes, startTimes, endTimes):
+        batch = ConstraintBatch(tasks, taskIndexes, startTimes, endTimes)
+        fitness = np.zeros(len(batch))
+        for constraint, penalty, award in self.constraints:
+            startTime = time.perf_counter()
+            violations, satisfied = constraint.counts(batch)
+            fitness += penalty * violations - award * satisfied
+
+            totals = self.totals[constraint.name]
+            totals['violations'] += int(violations.sum())
+            totals['penalty'] += penalty * int(violations.sum())
+            totals['awards'] += award * int(satisfied.sum())
+            totals['seconds'] += time.perf_counter() - startTime
+
+        self.schedules += len(batch)
+        return fitness
+
+    # Function to evaluate the fitness of a whole population of schedules, used as a geneticAlgorithm evaluator
+    def evaluatePopulation(self, population):
+        if not population:
+            return []
+        return self.evaluateMatrices(population[0].tasks, *populationMatrices(population)).tolist()
+
+    def evaluate(self, schedule):
+        return self.evaluatePopulation([schedule])[0]
+
+    # Function to get the totals of each constraint with its share of the evaluation time
+    def report(self):
+        totalSeconds = sum(totals['seconds'] for totals in self.totals.values()) or 1
+        return {name: dict(totals, timeShare=totals['seconds'] / totalSeconds) for name, totals in self.totals.items()}
+
+# Function to build the pipeline that scores schedules like evaluateSchedule does
+def defaultConstraintPipeline():
+    return ConstraintPipeline().register(OverlapConstraint()).register(BreakConstraint())
+
+##################################################
+
+########## Genetic Algorithm Parallel Evaluation ##########
+
+# Date of every task, indexed by task index, set once in each worker process
+workerDates = None
+
+def initialisePoolWorker(compiledTasks):
+    global workerDates
+    workerDates = compiledTasks.dateArray
+
+def evaluatePoolChunk(chunk):
+    taskIndexes, startTimes, endTimes = chunk
+    return evaluateTimeMatrix(startTimes, endTimes, workerDates[taskIndexes])
+
+class PoolEvaluator:
+    """
+    Persistent pool of worker processes that evaluates populations in chunks
+
+    Args:
+    compiledTasks (CompiledTasks): Task table sent to each worker once when it starts
+    processes (int): Number of worker processes
+    """
+
+    def __init__(self, compiledTasks, processes):
+        self.processes = processes
+        self.pool = multiprocessing.Pool(processes, initializer=initialisePoolWorker, initargs=(compiledTasks,))
+
+    def evaluatePopulation(self, population):
+        if not population:
+            return []
+
+        # Only the schedules' own arrays are sent, the workers already hold the task table
+        numChunks = min(self.processes, len(population))
+        chunks = zip(*(np.array_split(matrix, numChunks) for matrix in populationMatrices(population)))
+
+        fitnessScores = []
+        for chunkScores in self.pool.map(evaluatePoolChunk, chunks):
+            fitnessScores.extend(chunkScores)
+        return fitnessScores
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+##################################################
+
+########## Genetic Algorithm Fitness Cache ##########
+
+# Function to build a hashable fingerprint of a schedule's genes
+def scheduleFingerprint(schedule):
+    return schedule.taskIndexes.tobytes() + schedule.startTimes.tobytes() + schedule.endTimes.tobytes()
+
+class FitnessCache:
+    """
+    Bounded least recently used cache of schedule fitness values
+
+    Args:
+    maxSize (int): Maximum number of schedules to remember, 0 disables caching
+
+    Attributes:
+    hits (int): Number of schedules scored without being evaluated
+    misses (int): Number of schedules that had to be evaluated
+    """
+
+    def __init__(self, maxSize=fitnessCacheSize):
+        self.maxSize = maxSize
+        self.scores = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def evaluatePopulation(self, population, evaluator=evaluatePopulation):
+        fingerprints = [scheduleFingerprint(schedule) for schedule in population]
+
+        # Look up every schedule, collecting the ones that still need evaluating
+        missing = {}
+        for index, fingerprint in enumerate(fingerprints):
+            if fingerprint in self.scores:
+                self.scores.move_to_end(fingerprint)
+                self.hits += 1
+            elif fingerprint in missing:
+                self.hits += 1  # Duplicate within the same population, only evaluated once
+            else:
+                missing[fingerprint] = index
+                self.misses += 1
+
+        # Evaluate the missing schedules together in a single batch
+        computed = dict(zip(missing, evaluator([population[index] for index in missing.values()])))
+        fitnessScores = [computed[fingerprint] if fingerprint in computed else self.scores[fingerprint] for fingerprint in fingerprints]
+
+        for fingerprint, fitness in computed.items():
+            self.store(fingerprint, fitness)
+
+        return fitnessScores
+
+    def evaluate(self, schedule, evaluator=evaluatePopulation):
+        return self.evaluatePopulation([schedule], evaluator)[0]
+
+    def store(self, fingerprint, fitness):
+        if self.maxSize <= 0:
+            return
+
+        self.scores[fingerprint] = fitness
+        self.scores.move_to_end(fingerprint)
+
+        # Evict the least recently used schedules
+        while len(self.scores) > self.maxSize:
+            self.scores.popitem(last=False)
+
+    def clear(self):
+        self.scores.clear()
+        self.hits = 0
+        self.misses = 0
+
+##################################################
+
+########## Genetic Algorithm Selection Operators ##########
+
+# Function to select parents using tournament selection
+# Selection operators draw every parent of a generation in one batched call
+
+def tournamentSelection(population, fitnessScores, tournamentSize, rng=random):
+    # Each row of contestants is one tournament, contestants are drawn with replacement
+    numParents = len(population)
+    contestants = np.array(rng.choices(range(numParents), k=numParents * tournamentSize)).reshape(numParents, tournamentSize)
+    winners = contestants[np.arange(numParents), np.asarray(fitnessScores)[contestants].argmin(axis=1)]
+    return [population[winner] for winner in winners]
+
+def rouletteWheelSelection(population, fitnessScores, rng=random):
+    # Lower fitness is better, weight each schedule by how far it is below the weakest one
+    maxFitness = max(fitnessScores)
+    weights = [maxFitness - fitness for fitness in fitnessScores]
+    cumulativeWeights = list(accumulate(weights))
+
+    # Every weight is zero, so every schedule is equally likely
+    if cumulativeWeights[-1] <= 0:
+        return rng.choices(population, k=len(population))
+
+    # choices finds each spin with a binary search over the cumulative weights
+    return rng.choices(population, cum_weights=cumulativeWeights, k=len(population))
+
+# Function to get the cumulative rank weights 1, 1 + 2, ..., which only depend on the population size
+@lru_cache(maxsize=None)
+def rankCumulativeWeights(populationSize):
+    return list(accumulate(range(1, populationSize + 1)))
+
+def rankBasedSelection(population, fitnessScores, rng=random):
+    # Ranked from the highest score to the lowest, so the best schedule gets the largest weight
+    rankedIndexes = sorted(range(len(population)), key=fitnessScores.__getitem__, reverse=True)
+    selectedIndexes = rng.choices(rankedIndexes, cum_weights=rankCumulativeWeights(len(population)), k=len(population))
+    return [population[index] for index in selectedIndexes]
+
+# Function to get the indexes of the lowest scores, best first.
+# heapq.nsmallest keeps equal scores in their original order, the same as a stable sort would
+def topIndexes(fitnessScores, count):
+    return heapq.nsmallest(count, range(len(fitnessScores)), key=fitnessScores.__getitem__)
 
 # Function to select the next generation of schedules based on fitness scores
 def selectNextGeneration(population, fitnessScores):
-    sortedPopulation = [x for _, x in sorted(zip(fitnessScores, population), key=lambda pair: pair[0], reverse=True)]
-    return sortedPopulation[:populationSize]
+    if len(population) != len(fitnessScores):
+        raise ValueError(f"Got {len(fitnessScores)} fitness scores for {len(population)} schedules")
+    return [population[index] for index in topIndexes(fitnessScores, populationSize)]
+
+# Function to choose which parents and children survive into the next generation
+def survivorSelection(parents, parentScores, children, childScores, strategy=survivorStrategy, elitism=elitism, populationSize=populationSize):
+    """
+    Keep the populationSize schedules with the lowest scores, every schedule must already have a score
+
+    Args:
+    parents (list): Current population
+    parentScores (list): Fitness of each parent
+    children (list): Children bred from the parents
+    childScores (list): Fitness of each child
+    strategy (str): 'plus' picks from parents and children together, 'comma' picks from the children
+    and only keeps the best elitism parents
+    populationSize (int): Number of survivors
+
+    Returns:
+    tuple: The survivors best first, and their fitness scores
+    """
+
+    if strategy == 'plus':
+        candidates = parents + children
+        candidateScores = parentScores + childScores
+    elif strategy == 'comma':
+        elites = topIndexes(parentScores, elitism)
+        candidates = [parents[index] for index in elites] + children
+        candidateScores = [parentScores[index] for index in elites] + childScores
+    else:
+        raise ValueError(f"Unknown survivor strategy: {strategy}")
+
+    survivors = topIndexes(candidateScores, populationSize)
+    return [candidates[index] for index in survivors], [candidateScores[index] for index in survivors]
 
 ##################################################
 
@@ -133,88 +1327,122 @@ def selectNextGeneration(population, fitnessScores):
 ########## Genetic Algorithm Crossover Operators ##########
 
 # Function to perform crossover between two parent schedules
-def onePointcrossover(schedule1, schedule2):
-    crossoverPoint = random.randint(0, min(len(schedule1), len(schedule2)))
-    child1 = schedule1[:crossoverPoint] + schedule2[crossoverPoint:]
-    child2 = schedule2[:crossoverPoint] + schedule1[crossoverPoint:]
+def onePointcrossover(schedule1, schedule2, rng=random):
+    crossoverPoint = rng.randint(0, min(len(schedule1), len(schedule2)))
+    child1 = schedule1.splice(schedule2, crossoverPoint, len(schedule2))
+    child2 = schedule2.splice(schedule1, crossoverPoint, len(schedule1))
     return child1, child2
 
-def twoPointcrossover(schedule1, schedule2):
-    crossoverPoints = sorted(random.sample(range(min(len(schedule1), len(schedule2))), 2))
-    child1 = schedule1[:crossoverPoints[0]] + schedule2[crossoverPoints[0]:crossoverPoints[1]] + schedule1[crossoverPoints[1]:]
-    child2 = schedule2[:crossoverPoints[0]] + schedule1[crossoverPoints[0]:crossoverPoints[1]] + schedule2[crossoverPoints[1]:]
+def twoPointcrossover(schedule1, schedule2, rng=random):
+    crossoverPoints = sorted(rng.sample(range(min(len(schedule1), len(schedule2))), 2))
+    child1 = schedule1.splice(schedule2, crossoverPoints[0], crossoverPoints[1])
+    child2 = schedule2.splice(schedule1, crossoverPoints[0], crossoverPoints[1])
     return child1, child2
 
-def uniformCrossover(schedule1, schedule2):
-    child1 = []
-    child2 = []
+def uniformCrossover(schedule1, schedule2, rng=random):
+    length = min(len(schedule1), len(schedule2))
+    child1 = schedule1.copy(length)
+    child2 = schedule2.copy(length)
 
-    for gene1, gene2 in zip(schedule1, schedule2):
-        if random.choice([True, False]):
-            child1.append(gene1)
-            child2.append(gene2)
-        else:
-            child1.append(gene2)
-            child2.append(gene1)
+    for position in range(length):
+        if not rng.choice([True, False]):
+            child1.setGene(position, schedule2, position)
+            child2.setGene(position, schedule1, position)
 
     return child1, child2
 
 ##################################################
 
 
+########## Genetic Algorithm Operator Registry ##########
+
+# Selection and crossover operators by name, so runs (and islands) can choose between them
+selectionOperators = {
+    'tournament': lambda population, fitnessScores, rng=random: tournamentSelection(population, fitnessScores, tournamentSize, rng),
+    'roulette': rouletteWheelSelection,
+    'rank': rankBasedSelection,
+}
+
+crossoverOperators = {
+    'onePoint': onePointcrossover,
+    'twoPoint': twoPointcrossover,
+    'uniform': uniformCrossover,
+}
+
+##################################################
+
+
 ########## Genetic Algorithm Mutation Operator ##########
 
-def mutate(schedule):
-    for task in schedule:
+def mutate(schedule, rng=random, mutationRate=mutationRate, collisionFreeMutation=collisionFreeMutation, mutateAllTasks=mutateAllTasks):
+    priorityCodes = schedule.tasks.priorityCodes
+    startTimes = schedule.startTimes
+    endTimes = schedule.endTimes
+    dateOrdinals = schedule.tasks.dateOrdinals
+    occupancy = OccupancyBitmap(schedule) if collisionFreeMutation else None
+
+    for position, taskIndex in enumerate(schedule.taskIndexes):
 
         #Check if task has priority level 4
-        if task['priority'] == 4:
+        if priorityCodes[taskIndex] == 4:
             continue
 
-        if random.uniform(0, 1) < mutationRate:
-            task['start_time'], task['end_time'] = mutateTime(task['start_time'], task['end_time'], schedule)
-        else:
-            # Mutate end time
-            mutatedTimes = mutateTime(task['start_time'], task['end_time'], schedule)
-            task['start_time'], task['end_time'] = mutatedTimes
+        if rng.uniform(0, 1) < mutationRate or mutateAllTasks:
+            if occupancy is None:
+                startTimes[position], endTimes[position] = mutateTime(startTimes[position], endTimes[position], schedule, rng)
+                continue
 
-    return schedule
+            # Move the task within the bitmap so the tasks after it see its new slots
+            date = dateOrdinals[taskIndex]
+            occupancy.remove(date, startTimes[position], endTimes[position])
+            startTimes[position], endTimes[position] = collisionFreeShift(occupancy, date, startTimes[position], endTimes[position], rng)
+            occupancy.add(date, startTimes[position], endTimes[position])
 
-def mutateTime(currentStartTime, currentEndTime, allTasks):
-    timeFormat = "%H:%M"
+    return schedule
 
+def mutateTime(currentStartTime, currentEndTime, allTasks, rng=random):
     # Mutate time by adding or subtracting a random duration in multiples of 5 (e.g., 5, 10, 15 minutes)
-    mutationMinutes = random.randint(1, 24) * 5  # Random multiples of 5 up to 120 minutes
-
-    # Convert current times to datetime objects
-    startTimeObj = datetime.datetime.strptime(currentStartTime, timeFormat)
-    endTimeObj = datetime.datetime.strptime(currentEndTime, timeFormat)
+    mutationMinutes = rng.randint(1, 24) * 5  # Random multiples of 5 up to 120 minutes
 
     # Randomly choose whether to add or subtract time
-    if random.choice([True, False]):
-        mutatedStartTime = startTimeObj + datetime.timedelta(minutes=mutationMinutes)
-        mutatedEndTime = endTimeObj + datetime.timedelta(minutes=mutationMinutes)
-    else:
-        mutatedStartTime = startTimeObj - datetime.timedelta(minutes=mutationMinutes)
-        mutatedEndTime = endTimeObj - datetime.timedelta(minutes=mutationMinutes)
+    if not rng.choice([True, False]):
+        mutationMinutes = -mutationMinutes
 
-    # Round the mutated times to the nearest multiple of 5
-    mutatedStartTime = roundTimeToMultiple(mutatedStartTime, 5)
-    mutatedEndTime = roundTimeToMultiple(mutatedEndTime, 5)
+    # Times wrap around midnight in the same way as the "%H:%M" clock does
+    mutatedStartTime = (currentStartTime + mutationMinutes) % minutesPerDay
+    mutatedEndTime = (currentEndTime + mutationMinutes) % minutesPerDay
 
-    return mutatedStartTime.strftime(timeFormat), mutatedEndTime.strftime(timeFormat)
-
-def roundTimeToMultiple(timeObj, multiple):
-    roundedMinute = (timeObj.minute // multiple) * multiple
-    return datetime.datetime(
-        timeObj.year, timeObj.month, timeObj.day,
-        timeObj.hour, roundedMinute
-    )
-
-def taskOverlap(startTime, endTime, task):
-    taskStartTime = datetime.datetime.strptime(task['start_time'], "%H:%M")
-    taskEndTime = datetime.datetime.strptime(task['end_time'], "%H:%M")
-    return not (endTime <= taskStartTime or startTime >= taskEndTime)
+    # Round the mutated times to the nearest multiple of 5
+    return roundTimeToMultiple(mutatedStartTime, 5), roundTimeToMultiple(mutatedEndTime, 5)
+
+# Function to shift a task by up to maxShift minutes to a start where it overlaps nothing in the occupancy bitmap
+# and keeps the minimum break, the task itself must not be in the bitmap.
+# Falls back to a random shift when there is no such start nearby.
+# Over 300 generations of 64 tasks it ends lower than random shifts at 16 tasks a day (-2.45 to -2.97 against -0.49 to -1.96)
+# and about level at 8 or 48, but each run takes about 3 times as long, so collisionFreeMutation is off by default
+def collisionFreeShift(occupancy, date, startTime, endTime, rng=random, maxShift=120):
+    duration = (endTime - startTime) % minutesPerDay
+    currentSlot = startTime // slotMinutes
+    maxSlots = maxShift // slotMinutes
+    window = slotRange(max(currentSlot - maxSlots, 0), currentSlot + maxSlots + 1) & ~(1 << currentSlot)
+    candidates = occupancy.freeStarts(date, duration) & window
+    if not candidates:
+        return mutateTime(startTime, endTime, None, rng)
+
+    # Pick one of the set bits, peeling them off lowest first
+    startSlots = []
+    while candidates:
+        lowest = candidates & -candidates
+        startSlots.append(lowest.bit_length() - 1)
+        candidates ^= lowest
+    startSlot = rng.choice(startSlots)
+    return startSlot * slotMinutes, startSlot * slotMinutes + duration
+
+def roundTimeToMultiple(minutes, multiple):
+    return (minutes // multiple) * multiple
+
+def taskOverlap(startTime, endTime, schedule, position):
+    return not (endTime <= schedule.startTimes[position] or startTime >= schedule.endTimes[position])
 
 
 ##################################################
@@ -230,71 +1458,449 @@ def displayScheduleTable(schedule):
     print(table)
 
 
-########## Genetic Algorithm Main Function ##########
+########## Genetic Algorithm Termination ##########
+
+# Function to measure population diversity as the fraction of distinct schedules
+def populationDiversity(population):
+    if not population:
+        return 0
+    return len({scheduleFingerprint(schedule) for schedule in population}) / len(population)
+
+class TerminationCriteria:
+    """
+    Decides when the genetic algorithm should stop and why
+
+    Args:
+    maxGenerations (int): Stop after this many generations
+    stallGenerations (int): Stop when the best fitness hasn't dropped by more than epsilon for this many generations, None disables
+    epsilon (float): Smallest drop in best fitness that counts as an improvement
+    timeLimit (float): Stop once this many seconds have passed since start, None disables
+    targetFitness (float): Stop once the best fitness drops to this value, None disables
+    diversityFloor (float): Stop once populationDiversity drops below this value, None disables
+    stopEvent (Event): Cancel once this multiprocessing Event is set, lets another process stop the run
+    """
+
+    def __init__(self, maxGenerations=None, stallGenerations=stallGenerations, epsilon=convergenceThreshold,
+                 timeLimit=timeLimit, targetFitness=targetFitness, diversityFloor=diversityFloor, stopEvent=None):
+        self.maxGenerations = numGenerations if maxGenerations is None else maxGenerations
+        self.stallGenerations = stallGenerations
+        self.epsilon = epsilon
+        self.timeLimit = timeLimit
+        self.targetFitness = targetFitness
+        self.diversityFloor = diversityFloor
+        self.stopEvent = stopEvent
+        self.cancelled = False
+        self.start()
+
+    def start(self):
+        self.startTime = time.perf_counter()
+        self.bestFitness = None
+        self.lastImprovement = 0
+
+    def elapsedSeconds(self):
+        return time.perf_counter() - self.startTime
+
+    def cancel(self):
+        # Can be called from another thread, the run stops at the next generation boundary
+        self.cancelled = True
+
+    def check(self, generation, bestFitness, population):
+        # Returns the reason to stop after this generation, or None to keep going
+        if self.bestFitness is None or self.bestFitness - bestFitness > self.epsilon:
+            self.bestFitness = bestFitness
+            self.lastImprovement = generation
+
+        if self.cancelled or (self.stopEvent is not None and self.stopEvent.is_set()):
+            return 'cancelled'
+        if self.targetFitness is not None and bestFitness <= self.targetFitness:
+            return 'targetFitness'
+        if self.timeLimit is not None and self.elapsedSeconds() >= self.timeLimit:
+            return 'timeLimit'
+        if self.diversityFloor is not None and populationDiversity(population) < self.diversityFloor:
+            return 'diversityFloor'
+        if self.stallGenerations is not None and generation - self.lastImprovement >= self.stallGenerations:
+            return 'stalled'
+        if generation + 1 >= self.maxGenerations:
+            return 'maxGenerations'
+        return None
 
-# Function to perform the genetic algorithm
-def geneticAlgorithm(tasks, progressCallback=None):
-
-    # Step 1: Initialise the population
-    population = initialiseSchedule(tasks, populationSize)
+##################################################
 
-    def bestFitness(population):
-        return max(population, key=evaluateSchedule)
 
-    def replace(population, children):
-        # Combine the population and children, and select the best individual
-        combinedPopulation = population + children
-        fitnessScores = [evaluateSchedule(schedule) for schedule in combinedPopulation]
-        sortedPopulation = [x for _, x in sorted(zip(fitnessScores, combinedPopulation), key=lambda pair: pair[0], reverse=True)]
+########## Genetic Algorithm Instrumentation ##########
+
+phaseNames = ['evaluation', 'selection', 'crossover', 'mutation', 'replacement']
+
+class RunMetrics:
+    """
+    Per-generation timings and fitness statistics for one genetic algorithm run
+
+    Args:
+    sinks (list): Callables that receive each generation's record as a dict
+    profile (bool): Run cProfile around the whole run, see profileStats
+
+    Each record holds the generation, elapsedSeconds, phaseSeconds (time spent in each phase that generation),
+    evaluations and cacheHits, bestFitness, meanFitness, worstFitness and diversity.
+    Phase times are exclusive, time spent evaluating inside replacement only counts as evaluation
+    """
+
+    def __init__(self, sinks=None, profile=False):
+        self.sinks = list(sinks or [])
+        self.profiler = cProfile.Profile() if profile else None
+        self.totalPhaseSeconds = dict.fromkeys(phaseNames, 0.0)
+        self.phaseSeconds = dict.fromkeys(phaseNames, 0.0)
+        self.activePhase = None
+        self.phaseStart = None
+        self.startTime = None
+
+    def addSink(self, sink):
+        self.sinks.append(sink)
+
+    def startRun(self):
+        self.startTime = time.perf_counter()
+        if self.profiler:
+            self.profiler.enable()
+
+    def finishRun(self):
+        if self.profiler:
+            self.profiler.disable()
+
+    @contextmanager
+    def phase(self, name):
+        # Pause the enclosing phase so the time isn't counted twice
+        now = time.perf_counter()
+        outerPhase = self.activePhase
+        if outerPhase:
+            self.phaseSeconds[outerPhase] += now - self.phaseStart
+        self.activePhase, self.phaseStart = name, now
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self.phaseSeconds[name] += now - self.phaseStart
+            self.activePhase, self.phaseStart = outerPhase, now
+
+    # Function to close a generation, sending its record to every sink
+    def recordGeneration(self, generation, population, fitnessScores, evaluations, cacheHits):
+        record = {
+            'generation': generation,
+            'elapsedSeconds': time.perf_counter() - self.startTime,
+            'phaseSeconds': self.phaseSeconds,
+            'evaluations': evaluations,
+            'cacheHits': cacheHits,
+            'bestFitness': min(fitnessScores),
+            'meanFitness': sum(fitnessScores) / len(fitnessScores),
+            'worstFitness': max(fitnessScores),
+            'diversity': populationDiversity(population),
+        }
+
+        for name, seconds in self.phaseSeconds.items():
+            self.totalPhaseSeconds[name] += seconds
+        self.phaseSeconds = dict.fromkeys(phaseNames, 0.0)
+
+        for sink in self.sinks:
+            sink(record)
+        return record
+
+    def profileStats(self, sortBy='cumulative', limit=30):
+        if not self.profiler:
+            return ""
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats(sortBy).print_stats(limit)
+        return output.getvalue()
+
+    def dumpProfile(self, path):
+        if self.profiler:
+            self.profiler.dump_stats(path)
+
+# Sink that appends each generation's record to a file as one JSON line
+class JsonlSink:
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def __call__(self, record):
+        self.file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self.file.close()
+
+# Sink that keeps the most recent generation records in memory
+class RingBufferSink:
+    def __init__(self, size=1000):
+        self.records = deque(maxlen=size)
+
+    def __call__(self, record):
+        self.records.append(record)
 
-        return sortedPopulation[:populationSize]
+##################################################
 
-    previousBestFitness = float('inf')  # Initialize with a large value
-    for generation in range(numGenerations):
 
-        if progressCallback:
-            progressCallback((generation + 1) * 100 / numGenerations)
+########## Genetic Algorithm Main Function ##########
 
-        # Step 2: Evaluate fitness
-        fitnessScores = [evaluateSchedule(schedule) for schedule in population]
+# Function to breed the children of one generation from the current population and its fitness scores
+def breedGeneration(population, fitnessScores, selectParents, crossover, metrics=None, rng=random, mutationRate=mutationRate, collisionFreeMutation=collisionFreeMutation,
+                    mutateAllTasks=mutateAllTasks):
+    phase = metrics.phase if metrics else nullcontext
 
-        # Step 3: Selection
-        selectedParents = tournamentSelection(population, fitnessScores, tournamentSize)
+    # Step 3: Selection
+    with phase('selection'):
+        selectedParents = selectParents(population, fitnessScores, rng)
 
-        # Step 4: Crossover
+    # Step 4: Crossover
+    with phase('crossover'):
         children = []
         for i in range(0, len(selectedParents), 2):
             parent1 = selectedParents[i]
-            parent2 = selectedParents[i + 1]
-            child1, child2 = uniformCrossover(parent1, parent2)
-            children.extend([child1, child2])
+            # With an odd number of parents the last one is paired with the first and only its first child is kept
+            parent2 = selectedParents[i + 1] if i + 1 < len(selectedParents) else selectedParents[0]
+            child1, child2 = crossover(parent1, parent2, rng)
+            children.extend([child1, child2][:len(selectedParents) - i])
 
-        # Step 5: Mutation
+    # Step 5: Mutation, children own their genes so this never changes a parent
+    with phase('mutation'):
         for child in children:
-            mutate(child)
+            mutate(child, rng, mutationRate, collisionFreeMutation, mutateAllTasks)
 
-        # Step 6: Create Next generation
-        population = selectNextGeneration(population + children, fitnessScores)
-        replace(population, children)
+    return children
 
-        # Return the best schedule from the final population
-        bestSchedule = max(population, key=evaluateSchedule)
-        bestFitness = evaluateSchedule(bestSchedule)
+# Function to perform the genetic algorithm
+def geneticAlgorithm(tasks, progressCallback=None, fitnessCache=None, processes=1, incremental=False, termination=None, generationCallback=None, verbose=True, metrics=None,
+                     survivorStrategy=survivorStrategy, elitism=elitism, seed=None, rng=None, initialisation=initialisationStrategy,
+                     initialPopulation=None, constraints=None, populationSize=populationSize, mutationRate=mutationRate,
+                     collisionFreeMutation=collisionFreeMutation, mutateAllTasks=mutateAllTasks):
+
+    # Stop on the default criteria unless the caller supplies their own
+    if termination is None:
+        termination = TerminationCriteria()
+
+    # Every random choice in the run comes from rng, a seed gives the run its own reproducible stream.
+    # Without either the run uses the shared random module
+    if rng is None:
+        rng = random.Random(seed) if seed is not None else random
+
+    # Parse the tasks once, the main loop only works on the compiled task table
+    compiledTasks = CompiledTasks(tasks)
+
+    # Scores are cached between generations, pass in a FitnessCache to inspect its hit and miss counters
+    if fitnessCache is None:
+        fitnessCache = FitnessCache()
+
+    # Incremental evaluation keeps per-schedule state, so it has to run in this process
+    if incremental and processes > 1:
+        raise ValueError("Incremental evaluation can't be combined with a process pool")
+
+    # A ConstraintPipeline scores schedules with its own constraints and keeps its totals in this process
+    if constraints is not None and (incremental or processes > 1):
+        raise ValueError("A constraint pipeline can't be combined with incremental evaluation or a process pool")
+
+    # Evaluate serially unless more than one process is requested
+    poolEvaluator = PoolEvaluator(compiledTasks, processes) if processes > 1 else None
+    if constraints is not None:
+        evaluator = constraints.evaluatePopulation
+    elif poolEvaluator:
+        evaluator = poolEvaluator.evaluatePopulation
+    elif incremental:
+        incrementalEvaluator = IncrementalEvaluator(2 * populationSize)
+        evaluator = incrementalEvaluator.evaluatePopulation
+    else:
+        evaluator = evaluatePopulation
 
-        # Print current best fitness for monitoring
-        print(f"Generation {generation + 1}: Best Fitness - {bestFitness}")
+    # Pass in a RunMetrics to record phase timings and fitness statistics for every generation
+    phase = metrics.phase if metrics else nullcontext
 
-        # Check for convergence
-        if previousBestFitness == convergenceThreshold:
-            print(f"Converged at generation {generation + 1}")
-            break
+    def scorePopulation(population):
+        with phase('evaluation'):
+            return fitnessCache.evaluatePopulation(population, evaluator)
 
-        previousBestFitness = bestFitness
+    # Step 1: Initialise the population, warm starts continue from a population saved by an earlier run
+    if initialPopulation:
+        population = importPopulation(compiledTasks, initialPopulation)[:populationSize]
+        population += initialiseSchedule(compiledTasks, populationSize - len(population), rng, initialisation)
+    else:
+        population = initialiseSchedule(compiledTasks, populationSize, rng, initialisation)
+
+    try:
+        termination.start()
+        if metrics:
+            metrics.startRun()
+        stopReason = 'maxGenerations'
+        evaluations, cacheHits = fitnessCache.misses, fitnessCache.hits
+
+        # Step 2: Evaluate fitness, after this each schedule is scored once when it is bred
+        fitnessScores = scorePopulation(population)
+
+        # The best initial schedule is the result when no generation runs
+        bestIndex = min(range(len(population)), key=fitnessScores.__getitem__)
+        bestSchedule, bestFitness = population[bestIndex], fitnessScores[bestIndex]
+        generationsRun = 0
+
+        for generation in range(termination.maxGenerations):
+            generationsRun = generation + 1
+
+            if progressCallback:
+                progressCallback((generation + 1) * 100 / termination.maxGenerations)
+
+            # Step 3 - 5: Selection, crossover and mutation
+            children = breedGeneration(population, fitnessScores, selectionOperators['tournament'], uniformCrossover, metrics, rng,
+                                       mutationRate, collisionFreeMutation, mutateAllTasks)
+            childScores = scorePopulation(children)
+
+            # Step 6: Create Next generation from the parents and their children, survivors come back best first
+            with phase('replacement'):
+                population, fitnessScores = survivorSelection(population, fitnessScores, children, childScores, survivorStrategy, elitism, populationSize)
+                if incremental:
+                    incrementalEvaluator.retain(population)
+
+            # Return the best schedule from the final population
+            bestSchedule = population[0]
+            bestFitness = fitnessScores[0]
+
+            if metrics:
+                metrics.recordGeneration(generation + 1, population, fitnessScores,
+                                         fitnessCache.misses - evaluations, fitnessCache.hits - cacheHits)
+            evaluations, cacheHits = fitnessCache.misses, fitnessCache.hits
+
+            # Print current best fitness for monitoring
+            if verbose:
+                print(f"Generation {generation + 1}: Best Fitness - {bestFitness}")
+
+            if generationCallback:
+                generationCallback(generation + 1, bestFitness, compiledTasks.decode(bestSchedule))
+
+            # Check whether any stopping criterion has been met
+            reason = termination.check(generation, bestFitness, population)
+            if reason:
+                stopReason = reason
+                if verbose and reason != 'maxGenerations':
+                    print(f"Stopped at generation {generation + 1}: {reason}")
+                break
+    finally:
+        if metrics:
+            metrics.finishRun()
+        if poolEvaluator:
+            poolEvaluator.close()
+
+    # Convert back to task dicts at the output boundary
+    bestSchedule = compiledTasks.decode(bestSchedule)
 
     # Print the best schedule in table format
-    print("Best Schedule:")
-    displayScheduleTable(bestSchedule)
+    if verbose:
+        print("Best Schedule:")
+        displayScheduleTable(bestSchedule)
+
+    return {
+        'bestSchedule': bestSchedule,
+        'bestFitness': bestFitness,
+        'generations': generationsRun,
+        'stopReason': stopReason,
+        'elapsedSeconds': termination.elapsedSeconds(),
+        'finalPopulation': exportPopulation(population),  # Pass back as initialPopulation to warm start the next run
+    }
+
+##################################################
 
-    return bestSchedule
+########## Genetic Algorithm Batch Optimisation ##########
+
+# Function to split tasks into one list per date, keeping each date's tasks in their original order
+def groupTasksByDate(tasks):
+    tasksByDate = {}
+    for task in tasks:
+        tasksByDate.setdefault(task['date'], []).append(task)
+    return tasksByDate
+
+batchStopEvent = None  # Set in each batch worker by initialiseBatchWorker
+
+# Function run once in each batch worker process. The stop event has to arrive here rather than with each day,
+# because multiprocessing events can only be shared with a process when it starts
+def initialiseBatchWorker(stopEvent):
+    global batchStopEvent
+    batchStopEvent = stopEvent
+
+# Function run in each batch worker process, optimising a single day
+def optimiseDay(dayArguments):
+    date, tasks, seed, terminationOptions, algorithmOptions, initialPopulation, verbose = dayArguments
+
+    # Days that haven't started when the batch is stopped are skipped
+    if batchStopEvent is not None and batchStopEvent.is_set():
+        return date, None
+
+    startTime = time.perf_counter()
+    termination = TerminationCriteria(stopEvent=batchStopEvent, **terminationOptions)
+    result = geneticAlgorithm(tasks, termination=termination, verbose=verbose, seed=seed,
+                              initialPopulation=initialPopulation, **algorithmOptions)
+    result['elapsedSeconds'] = time.perf_counter() - startTime
+    return date, result
+
+# Function to optimise every date in a list of tasks, days are independent so they run in parallel
+def optimiseDateRange(tasks, processes=None, progressCallback=None, dayCallback=None, cancelled=None, terminationOptions=None, verbose=True, seed=None, initialPopulations=None,
+                      algorithmOptions=None, stopEvent=None):
+    """
+    Run the genetic algorithm separately for each date, one process per day
+
+    Args:
+    tasks (list): List of task dicts covering any number of dates
+    processes (int): Number of worker processes, defaults to the number of CPUs
+    progressCallback (function): Called with the percentage of days completed
+    dayCallback (function): Called with the date and result of each day as it finishes
+    cancelled (function): Polled between days, returning True stops the batch and keeps the days already finished
+    terminationOptions (dict): Keyword arguments for each day's TerminationCriteria
+    algorithmOptions (dict): Other keyword arguments for each day's geneticAlgorithm, such as populationSize and mutationRate.
+    Worker processes don't necessarily see changes to this module's parameters, so pass settings here instead
+    verbose (bool): Print progress and each day's best schedule
+    seed (int): Seed for the per-day seeds, the same seed and tasks give the same schedules
+    initialPopulations (dict): Saved population to warm start each date from, keyed by date
+    stopEvent (Event): multiprocessing Event that can be set from any thread to stop the batch straight away.
+    Running days stop at their next generation and keep their best schedule so far, days not yet started are skipped
+
+    Returns:
+    dict: The result of each finished day in days, schedules holds each day's best schedule,
+    with the total wall-clock time in elapsedSeconds
+    """
+
+    startTime = time.perf_counter()
+    tasksByDate = groupTasksByDate(tasks)
+    terminationOptions = terminationOptions or {}
+    rng = random.Random(seed) if seed is not None else random
+    algorithmOptions = algorithmOptions or {}
+    initialPopulations = initialPopulations or {}
+    dayArguments = [(date, dateTasks, rng.getrandbits(32), terminationOptions, algorithmOptions, initialPopulations.get(date), verbose)
+                    for date, dateTasks in sorted(tasksByDate.items())]
+
+    days = {}
+    stopReason = 'completed'
+    if dayArguments:
+        processes = min(processes or multiprocessing.cpu_count(), len(dayArguments))
+        pool = multiprocessing.Pool(processes, initializer=initialiseBatchWorker, initargs=(stopEvent,))
+        try:
+            for date, result in pool.imap_unordered(optimiseDay, dayArguments):
+                if result is None:
+                    continue
+                days[date] = result
+                if verbose:
+                    print(f"Optimised {date} in {result['elapsedSeconds']:.2f}s: Best Fitness - {result['bestFitness']}")
+                if dayCallback:
+                    dayCallback(date, result)
+                if progressCallback:
+                    progressCallback(len(days) * 100 / len(dayArguments))
+                if cancelled and cancelled():
+                    stopReason = 'cancelled'
+                    break
+        finally:
+            pool.terminate()
+            pool.join()
+        if stopEvent is not None and stopEvent.is_set():
+            stopReason = 'cancelled'
+
+    elapsedSeconds = time.perf_counter() - startTime
+    if verbose:
+        print(f"Optimised {len(days)} of {len(dayArguments)} days in {elapsedSeconds:.2f}s")
+
+    days = dict(sorted(days.items()))
+    return {
+        'days': days,
+        'schedules': {date: result['bestSchedule'] for date, result in days.items()},
+        'stopReason': stopReason,
+        'elapsedSeconds': elapsedSeconds,
+    }
 
-##################################################
\ No newline at end of file
+##################################################
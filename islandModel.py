@@ -0,0 +1,200 @@
+import random
+import time
+import multiprocessing
+import geneticAlgorithm as ga
+
+
+########## Island Model Parameters ##########
+
+numIslands = 4
+migrationInterval = 50
+migrationSize = 2
+migrationTopology = 'ring'
+
+# Selection and crossover used by each island, islands cycle through this list
+defaultIslandOperators = [
+    ('tournament', 'uniform'),
+    ('rank', 'onePoint'),
+    ('tournament', 'twoPoint'),
+    ('rank', 'uniform'),
+]
+
+##################################################
+
+
+########## Island Migration ##########
+
+# Function to work out which islands each island sends its migrants to
+def migrationTargets(topology, numIslands, rng=random):
+    if topology == 'ring':
+        return {source: [(source + 1) % numIslands] for source in range(numIslands)}
+    if topology == 'fullyConnected':
+        return {source: [target for target in range(numIslands) if target != source] for source in range(numIslands)}
+    if topology == 'random':
+        return {source: [rng.choice([target for target in range(numIslands) if target != source])] for source in range(numIslands)}
+    raise ValueError(f"Unknown migration topology: {topology}")
+
+# Function to route each island's emigrants to the islands that receive them
+def migrate(emigrants, topology, rng=random):
+    immigrants = [[] for _ in emigrants]
+    if len(emigrants) < 2:
+        return immigrants
+
+    for source, targets in migrationTargets(topology, len(emigrants), rng).items():
+        for target in targets:
+            immigrants[target].extend(emigrants[source])
+    return immigrants
+
+##################################################
+
+
+########## Island Worker ##########
+
+# Function run in each island process, evolving its own population between migrations
+# Settings come in as arguments, a spawned process only sees the module defaults
+def runIsland(connection, compiledTasks, selectionName, crossoverName, migrationSize, seed, populationSize):
+    rng = random.Random(seed)
+    selectParents = ga.selectionOperators[selectionName]
+    crossover = ga.crossoverOperators[crossoverName]
+    fitnessCache = ga.FitnessCache()
+
+    population = ga.initialiseSchedule(compiledTasks, populationSize, rng)
+    migrantsReceived = 0
+    generationsRun = 0
+    startTime = time.perf_counter()
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        generations, immigrants = message
+
+        # Immigrants replace the weakest members of the island
+        if immigrants:
+            fitnessScores = fitnessCache.evaluatePopulation(population)
+            ranked = sorted(range(len(population)), key=fitnessScores.__getitem__, reverse=True)
+            for index, genes in zip(ranked, immigrants):
+                population[index] = ga.Schedule(compiledTasks, *genes)
+            migrantsReceived += len(immigrants)
+
+        fitnessScores = fitnessCache.evaluatePopulation(population)
+        for _ in range(generations):
+            children = ga.breedGeneration(population, fitnessScores, selectParents, crossover, rng=rng)
+            population, fitnessScores = ga.survivorSelection(population, fitnessScores, children, fitnessCache.evaluatePopulation(children),
+                                                             populationSize=populationSize)
+        generationsRun += generations
+
+        # Report the island's best schedules, the top ones become emigrants.
+        # Only their arrays are sent, every process already has the task table
+        fitnessScores = fitnessCache.evaluatePopulation(population)
+        ranked = sorted(range(len(population)), key=fitnessScores.__getitem__)
+        connection.send({
+            'emigrants': [population[index].genes() for index in ranked[:migrationSize]],
+            'bestSchedule': population[ranked[0]].genes(),
+            'stats': {
+                'selection': selectionName,
+                'crossover': crossoverName,
+                'generations': generationsRun,
+                'bestFitness': fitnessScores[ranked[0]],
+                'meanFitness': sum(fitnessScores) / len(fitnessScores),
+                'migrantsReceived': migrantsReceived,
+                'evaluations': fitnessCache.misses,
+                'elapsedSeconds': time.perf_counter() - startTime,
+            },
+        })
+
+    connection.close()
+
+##################################################
+
+
+########## Island Model Main Function ##########
+
+# Function to run the genetic algorithm on several islands that periodically exchange their best schedules
+def islandGeneticAlgorithm(tasks, numIslands=numIslands, migrationInterval=migrationInterval, migrationSize=migrationSize, topology=migrationTopology, islandOperators=None, progressCallback=None, seed=None,
+                           numGenerations=ga.numGenerations, populationSize=ga.populationSize, verbose=True):
+    """
+    Run one population per process and migrate the best schedules between them
+
+    Args:
+    tasks (list): List of task dicts to schedule
+    numIslands (int): Number of islands, each runs in its own process
+    migrationInterval (int): Generations between migrations
+    migrationSize (int): Number of top schedules each island sends per migration
+    topology (str): 'ring', 'fullyConnected' or 'random'
+    islandOperators (list): (selection, crossover) operator names for each island
+    progressCallback (function): Called with the percentage of generations completed
+    seed (int): Seed for the island seeds and random migration, the same seed gives the same result
+    numGenerations (int): Generations each island runs, 0 only scores the initial populations
+    populationSize (int): Number of schedules on each island
+    verbose (bool): Print the progress at each migration and the best schedule table
+
+    Returns:
+    dict: bestSchedule and bestFitness across all islands, with per-island statistics in islands
+    """
+
+    compiledTasks = ga.CompiledTasks(tasks)
+    rng = random.Random(seed) if seed is not None else random
+    islandOperators = islandOperators or defaultIslandOperators
+    migrationTargets(topology, numIslands)  # Reject unknown topologies before starting any process
+
+    connections = []
+    processes = []
+    for island in range(numIslands):
+        selectionName, crossoverName = islandOperators[island % len(islandOperators)]
+        parentConnection, childConnection = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=runIsland,
+            args=(childConnection, compiledTasks, selectionName, crossoverName, migrationSize, rng.getrandbits(32), populationSize),
+            daemon=True,
+        )
+        process.start()
+        connections.append(parentConnection)
+        processes.append(process)
+
+    try:
+        immigrants = [[] for _ in connections]
+        generation = 0
+
+        # Every island reports at least once, so a run of 0 generations still returns the best initial schedule
+        while True:
+            generations = max(min(migrationInterval, numGenerations - generation), 0)
+            for connection, islandImmigrants in zip(connections, immigrants):
+                connection.send((generations, islandImmigrants))
+            reports = [connection.recv() for connection in connections]
+            generation += generations
+
+            if progressCallback:
+                progressCallback(generation * 100 / numGenerations if numGenerations > 0 else 100)
+
+            bestReport = min(reports, key=lambda report: report['stats']['bestFitness'])
+            if verbose:
+                print(f"Generation {generation}: Best Fitness - {bestReport['stats']['bestFitness']}")
+
+            if generation >= numGenerations:
+                break
+            immigrants = migrate([report['emigrants'] for report in reports], topology, rng)
+
+        for connection in connections:
+            connection.send(None)
+    finally:
+        for connection in connections:
+            connection.close()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    bestSchedule = compiledTasks.decode(ga.Schedule(compiledTasks, *bestReport['bestSchedule']))
+
+    if verbose:
+        print("Best Schedule:")
+        ga.displayScheduleTable(bestSchedule)
+
+    return {
+        'bestSchedule': bestSchedule,
+        'bestFitness': bestReport['stats']['bestFitness'],
+        'islands': [report['stats'] for report in reports],
+    }
+
+##################################################
@@ -0,0 +1,218 @@
+import argparse
+import csv
+import io
+import json
+import sqlite3
+import sys
+import geneticAlgorithm as ga
+from plannerDatabase import PlannerDatabase
+
+# Headless entry point for running the genetic algorithm without the PyQt window.
+# Examples:
+#   python plannerCli.py --database data.db --start-date 2024-03-01 --end-date 2024-03-31 --batch --write-back
+#   python plannerCli.py --csv tasks.csv --format csv --output schedule.csv
+#   python plannerCli.py < tasks.json
+#
+# JSON and CSV input use the task fields the genetic algorithm works on:
+# task_name, date, start_time, end_time and priority.
+# The best schedule is written to --output (stdout by default) and the run statistics
+# are written as one line of JSON to --stats (stderr by default).
+
+taskFields = ['task_name', 'date', 'start_time', 'end_time', 'priority']
+resultSchedules = ('bestSchedule', 'finalPopulation')  # Result keys left out of the run statistics
+
+
+########## Task Input ##########
+
+# Function to read task dicts from CSV text, the header row names the task fields
+def readCsvTasks(file):
+    tasks = []
+    for row in csv.DictReader(file):
+        task = {field: row[field] for field in taskFields}
+        task['priority'] = int(task['priority'])
+        tasks.append(task)
+    return tasks
+
+# Function to read task dicts from a JSON list
+def readJsonTasks(file):
+    return [{field: task[field] for field in taskFields} for task in json.load(file)]
+
+def readTasks(arguments):
+    if arguments.database:
+        return ga.DatabaseTaskSource(arguments.database).loadTasks(arguments.start_date, arguments.end_date)
+    if arguments.csv:
+        with open(arguments.csv, newline='') as file:
+            return readCsvTasks(file)
+    return readJsonTasks(sys.stdin)
+
+##################################################
+
+
+########## Schedule Output ##########
+
+# Function to turn a schedule into JSON or CSV text
+def formatSchedule(schedule, outputFormat):
+    if outputFormat == 'json':
+        return json.dumps(schedule, indent=2) + "\n"
+
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=taskFields, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(schedule)
+    return output.getvalue()
+
+def writeText(path, text, default):
+    if path is None:
+        default.write(text)
+    else:
+        with open(path, 'w', newline='') as file:
+            file.write(text)
+
+##################################################
+
+
+########## Command Line ##########
+
+def parseArguments(argv=None):
+    parser = argparse.ArgumentParser(description="Optimise planner schedules with the genetic algorithm, without a display")
+
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--database', help="Read tasks from the planner table of this SQLite database")
+    source.add_argument('--csv', help="Read tasks from this CSV file (JSON is read from stdin when no source is given)")
+    parser.add_argument('--start-date', help="First date to optimise when reading a database (inclusive)")
+    parser.add_argument('--end-date', help="Last date to optimise when reading a database (inclusive)")
+
+    parser.add_argument('--output', help="Write the best schedule to this file instead of stdout")
+    parser.add_argument('--format', choices=['json', 'csv'], default='json', help="Format of the best schedule")
+    parser.add_argument('--stats', help="Write the run statistics to this file instead of stderr")
+    parser.add_argument('--write-back', action='store_true', help="Replace each optimised date in the database with its best schedule")
+    parser.add_argument('--verbose', action='store_true', help="Print the per-generation progress and the best schedule table")
+    parser.add_argument('--metrics', help="Write per-generation timings and fitness statistics to this JSONL file")
+    parser.add_argument('--profile', help="Run cProfile around the genetic algorithm and save the stats to this file")
+
+    parser.add_argument('--batch', action='store_true', help="Optimise each date separately and in parallel")
+    parser.add_argument('--generations', type=int, default=ga.numGenerations, help="Maximum number of generations")
+    parser.add_argument('--population-size', type=int, default=ga.populationSize)
+    parser.add_argument('--mutation-rate', type=float, default=ga.mutationRate)
+    parser.add_argument('--mutate-all-tasks', action=argparse.BooleanOptionalAction, default=ga.mutateAllTasks,
+                        help="Shift every unpinned task on each mutation, --no-mutate-all-tasks only shifts tasks at the mutation rate")
+    parser.add_argument('--collision-free-mutation', action='store_true', help="Only shift tasks to free time that keeps the minimum break from the other tasks on their date")
+    parser.add_argument('--stall-generations', type=int, default=ga.stallGenerations, help="Stop after this many generations without improvement, 0 disables")
+    parser.add_argument('--time-limit', type=float, default=ga.timeLimit, help="Stop after this many seconds")
+    parser.add_argument('--target-fitness', type=float, default=ga.targetFitness, help="Stop once the best fitness reaches this value")
+    parser.add_argument('--processes', type=int, default=1, help="Worker processes for evaluation, or for days with --batch")
+    parser.add_argument('--incremental', action='store_true', help="Use incremental fitness evaluation")
+    parser.add_argument('--survivor-strategy', choices=['plus', 'comma'], default=ga.survivorStrategy, help="Keep the best of parents and children (plus) or of the children only (comma)")
+    parser.add_argument('--elitism', type=int, default=ga.elitism, help="Best parents that always survive with --survivor-strategy comma")
+    parser.add_argument('--initialisation', choices=['random', 'greedy', 'sorted', 'mixed'], default=ga.initialisationStrategy,
+                        help="How the starting population is built, the heuristics help on days with free time but can stall on full days")
+    parser.add_argument('--seed', type=int, help="Seed the random number generator for a reproducible run")
+    parser.add_argument('--working-hours', metavar='START-END', help="Penalise tasks outside these hours, e.g. 08:00-18:00")
+    parser.add_argument('--pin-everyday', action='store_true', help="Penalise Everyday Events (priority 4) that were moved from their planned times")
+
+    arguments = parser.parse_args(argv)
+    if arguments.write_back and not arguments.database:
+        parser.error("--write-back needs --database")
+    if arguments.batch and (arguments.metrics or arguments.profile):
+        parser.error("--metrics and --profile can't be combined with --batch")
+    if (arguments.working_hours or arguments.pin_everyday) and (arguments.batch or arguments.incremental or arguments.processes > 1):
+        parser.error("--working-hours and --pin-everyday can't be combined with --batch, --incremental or --processes")
+    if arguments.working_hours and len(arguments.working_hours.split("-")) != 2:
+        parser.error("--working-hours must look like 08:00-18:00")
+    return arguments
+
+# Function to build the constraint pipeline asked for on the command line, or None for the built-in evaluator
+def constraintPipeline(arguments):
+    if not (arguments.working_hours or arguments.pin_everyday):
+        return None
+
+    pipeline = ga.defaultConstraintPipeline()
+    if arguments.pin_everyday:
+        pipeline.register(ga.PinnedConstraint())
+    if arguments.working_hours:
+        pipeline.register(ga.WorkingHoursConstraint(*arguments.working_hours.split("-")))
+    return pipeline
+
+def main(argv=None):
+    arguments = parseArguments(argv)
+
+    # A missing or unreadable source is reported in the run statistics like an empty one, not as a traceback
+    try:
+        tasks = readTasks(arguments)
+    except (sqlite3.Error, OSError, ValueError, KeyError, TypeError) as error:
+        message = f"Missing task field {error}" if isinstance(error, KeyError) else str(error)
+        writeText(arguments.stats, json.dumps({'error': f"Could not read tasks: {message}"}) + "\n", sys.stderr)
+        return 1
+    stats = {'tasks': len(tasks)}
+
+    if not tasks:
+        stats['error'] = "No tasks to optimise"
+        writeText(arguments.stats, json.dumps(stats) + "\n", sys.stderr)
+        return 1
+
+    # Settings are passed to the engine as arguments rather than set on its module, because --batch
+    # worker processes started with spawn import a fresh copy of the module and would never see them
+    terminationOptions = {
+        'maxGenerations': arguments.generations,
+        'stallGenerations': arguments.stall_generations or None,
+        'timeLimit': arguments.time_limit,
+        'targetFitness': arguments.target_fitness,
+    }
+    algorithmOptions = {
+        'populationSize': arguments.population_size,
+        'mutationRate': arguments.mutation_rate,
+        'collisionFreeMutation': arguments.collision_free_mutation,
+        'mutateAllTasks': arguments.mutate_all_tasks,
+        'incremental': arguments.incremental,
+        'survivorStrategy': arguments.survivor_strategy,
+        'elitism': arguments.elitism,
+        'initialisation': arguments.initialisation,
+    }
+    if arguments.batch:
+        result = ga.optimiseDateRange(tasks, processes=arguments.processes, terminationOptions=terminationOptions, verbose=arguments.verbose, seed=arguments.seed,
+                                      algorithmOptions=algorithmOptions)
+        schedules = result['schedules']
+        bestSchedule = [task for schedule in schedules.values() for task in schedule]
+        stats.update({
+            'stopReason': result['stopReason'],
+            'elapsedSeconds': result['elapsedSeconds'],
+            'days': {date: {key: value for key, value in dayResult.items() if key not in resultSchedules} for date, dayResult in result['days'].items()},
+        })
+    else:
+        constraints = constraintPipeline(arguments)
+        metrics = None
+        if arguments.metrics or arguments.profile:
+            metrics = ga.RunMetrics([ga.JsonlSink(arguments.metrics)] if arguments.metrics else [], profile=bool(arguments.profile))
+        try:
+            result = ga.geneticAlgorithm(tasks, processes=arguments.processes, termination=ga.TerminationCriteria(**terminationOptions),
+                                         verbose=arguments.verbose, metrics=metrics, seed=arguments.seed, constraints=constraints, **algorithmOptions)
+        finally:
+            if metrics:
+                for sink in metrics.sinks:
+                    sink.close()
+                if arguments.profile:
+                    metrics.dumpProfile(arguments.profile)
+        bestSchedule = result['bestSchedule']
+        schedules = ga.groupTasksByDate(bestSchedule)
+        stats.update({key: value for key, value in result.items() if key not in resultSchedules})
+        if metrics:
+            stats['phaseSeconds'] = metrics.totalPhaseSeconds
+        if constraints:
+            stats['constraints'] = constraints.report()
+
+    if arguments.write_back:
+        database = PlannerDatabase(arguments.database)
+        try:
+            stats['rowsAffected'] = database.replaceDays(schedules)
+        finally:
+            database.close()
+
+    writeText(arguments.output, formatSchedule(bestSchedule, arguments.format), sys.stdout)
+    writeText(arguments.stats, json.dumps(stats) + "\n", sys.stderr)
+    return 0
+
+##################################################
+
+
+if __name__ == "__main__":
+    sys.exit(main())
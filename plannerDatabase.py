@@ -0,0 +1,172 @@
+import json
+import sqlite3
+
+
+########## Planner Database Queries ##########
+
+# Queries are kept as constant strings so sqlite3 prepares each one once and reuses it from its statement cache
+createTableQuery = "CREATE TABLE IF NOT EXISTS planner (id INTEGER PRIMARY KEY AUTOINCREMENT, task TEXT, completed TEXT, date TEXT, startTime TEXT, endTime TEXT, priority INTEGER)"
+createDateIndexQuery = "CREATE INDEX IF NOT EXISTS plannerDate ON planner (date)"
+createDateStartTimeIndexQuery = "CREATE INDEX IF NOT EXISTS plannerDateStartTime ON planner (date, startTime)"
+
+selectPlannerRowsQuery = "SELECT * FROM planner"
+insertTaskQuery = "INSERT INTO planner (task, completed, date, startTime, endTime, priority) VALUES (?, ?, ?, ?, ?, ?)"
+deleteDateQuery = "DELETE FROM planner WHERE date = ?"
+deleteDateRangeQuery = "DELETE FROM planner WHERE date >= ? AND date <= ?"
+deleteAllQuery = "DELETE FROM planner"
+
+# Pages of the task list are read by keyset so each page is an index range scan, however far into the list it starts.
+# Rows come back in the planner column order and a page continues after the (date, startTime, id) of the last row read
+selectTaskPageForDateQuery = "SELECT id, task, completed, date, startTime, endTime, priority FROM planner WHERE date = ? AND (startTime, id) > (?, ?) ORDER BY startTime, id LIMIT ?"
+selectTaskPageQuery = "SELECT id, task, completed, date, startTime, endTime, priority FROM planner WHERE (date, startTime, id) > (?, ?, ?) ORDER BY date, startTime, id LIMIT ?"
+selectTaskByIdQuery = "SELECT id, task, completed, date, startTime, endTime, priority FROM planner WHERE id = ?"
+deleteTaskByIdQuery = "DELETE FROM planner WHERE id = ?"
+updateTaskByIdQuery = "UPDATE planner SET task = ?, startTime = ?, endTime = ?, priority = ? WHERE id = ?"
+updateCompletedByIdQuery = "UPDATE planner SET completed = ? WHERE id = ?"
+
+# Final population of the last optimisation of each date, used to warm start the next one
+createWarmStartTableQuery = "CREATE TABLE IF NOT EXISTS warmStart (date TEXT PRIMARY KEY, population TEXT)"
+selectWarmStartQuery = "SELECT population FROM warmStart WHERE date = ?"
+replaceWarmStartQuery = "INSERT OR REPLACE INTO warmStart (date, population) VALUES (?, ?)"
+deleteAllWarmStartsQuery = "DELETE FROM warmStart"
+
+##################################################
+
+
+########## Planner Database ##########
+
+# Function to extract task dicts from planner table rows
+def rowsToTasks(rows):
+    return [{'task_name': row[1], 'date': row[3], 'start_time': row[4], 'end_time': row[5], 'priority': row[6]} for row in rows]
+
+# Function to load task dicts over an open connection, optionally only those between two dates (inclusive).
+# Shared by PlannerDatabase and the genetic algorithm's DatabaseTaskSource
+def selectTasks(connection, startDate=None, endDate=None):
+    query = selectPlannerRowsQuery
+    conditions = []
+    row = []
+    if startDate is not None:
+        conditions.append("date >= ?")
+        row.append(str(startDate))
+    if endDate is not None:
+        conditions.append("date <= ?")
+        row.append(str(endDate))
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    return rowsToTasks(connection.execute(query, row).fetchall())
+
+# Function to turn schedule task dicts into planner rows, on the given date or each task's own date
+def scheduleRows(schedule, date=None):
+    return [(task.get('task_name', ''), "NO", str(date) if date is not None else task.get('date', ''),
+             task.get('start_time', ''), task.get('end_time', ''), task.get('priority', '')) for task in schedule]
+
+
+class PlannerDatabase:
+    """
+    Data access for the planner table over a single long-lived SQLite connection
+
+    Args:
+    path (str): Path to the SQLite database, created if it doesn't exist
+
+    The connection runs in WAL mode and the table is indexed on (date) and (date, startTime),
+    so looking up a day doesn't scan the whole planner
+    """
+
+    def __init__(self, path='data.db'):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+
+        with self.connection:
+            self.connection.execute(createTableQuery)
+            self.connection.execute(createDateIndexQuery)
+            self.connection.execute(createDateStartTimeIndexQuery)
+            self.connection.execute(createWarmStartTableQuery)
+
+    def close(self):
+        self.connection.close()
+
+    # Function to load tasks in the dict form used by the genetic algorithm, so the database can be used as a task source
+    def loadTasks(self, startDate=None, endDate=None):
+        return selectTasks(self.connection, startDate, endDate)
+
+    # Function to add a task, returns the id of its row
+    def addTask(self, task, date, startTime, endTime, priority):
+        with self.connection:
+            return self.connection.execute(insertTaskQuery, (task, "NO", str(date), startTime, endTime, priority)).lastrowid
+
+    # Function to read up to limit rows ordered by (date, startTime, id), starting after the row key given in after.
+    # The key of the last row of one page is the after of the next, the first page starts after ('', '', 0)
+    def taskPage(self, date=None, after=('', '', 0), limit=100):
+        if date is None:
+            return self.connection.execute(selectTaskPageQuery, (*after, limit)).fetchall()
+        return self.connection.execute(selectTaskPageForDateQuery, (str(date), after[1], after[2], limit)).fetchall()
+
+    def taskById(self, taskId):
+        return self.connection.execute(selectTaskByIdQuery, (taskId,)).fetchone()
+
+    def deleteTaskById(self, taskId):
+        with self.connection:
+            return self.connection.execute(deleteTaskByIdQuery, (taskId,)).rowcount
+
+    def updateTaskById(self, taskId, task, startTime, endTime, priority):
+        with self.connection:
+            return self.connection.execute(updateTaskByIdQuery, (task, startTime, endTime, priority, taskId)).rowcount
+
+    # Function to toggle the completed flag of many tasks in one transaction, changes are (task id, completed) tuples
+    def setCompletedMany(self, changes):
+        rows = [("YES" if completed else "NO", taskId) for taskId, completed in changes]
+        with self.connection:
+            return self.connection.executemany(updateCompletedByIdQuery, rows).rowcount
+
+    # Bulk write-back: each function below applies all of its deletes and inserts in a single transaction
+    # and returns the number of rows affected
+
+    # Function to replace the tasks on each date with the given schedule
+    def replaceSchedule(self, schedule, dates):
+        dates = [str(date) for date in dates]
+        rows = [row for date in dates for row in scheduleRows(schedule, date)]
+        with self.connection:
+            deleted = self.connection.executemany(deleteDateQuery, [(date,) for date in dates]).rowcount
+            inserted = self.connection.executemany(insertTaskQuery, rows).rowcount
+        return deleted + inserted
+
+    # Function to replace the tasks on one date
+    def replaceDay(self, schedule, date):
+        return self.replaceSchedule(schedule, [date])
+
+    # Function to replace the tasks on several dates, each with its own schedule
+    def replaceDays(self, schedules):
+        dates = [(str(date),) for date in schedules]
+        rows = [row for date, schedule in schedules.items() for row in scheduleRows(schedule, date)]
+        with self.connection:
+            deleted = self.connection.executemany(deleteDateQuery, dates).rowcount
+            inserted = self.connection.executemany(insertTaskQuery, rows).rowcount
+        return deleted + inserted
+
+    # Function to replace every task from startDate to endDate (inclusive), tasks are written on their own dates
+    def replaceDateRange(self, schedule, startDate, endDate):
+        with self.connection:
+            deleted = self.connection.execute(deleteDateRangeQuery, (str(startDate), str(endDate))).rowcount
+            inserted = self.connection.executemany(insertTaskQuery, scheduleRows(schedule)).rowcount
+        return deleted + inserted
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute(deleteAllQuery)
+            self.connection.execute(deleteAllWarmStartsQuery)
+
+    # Function to get the population saved for a date, or None
+    def loadPopulation(self, date):
+        row = self.connection.execute(selectWarmStartQuery, (str(date),)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def savePopulation(self, date, population):
+        with self.connection:
+            self.connection.execute(replaceWarmStartQuery, (str(date), json.dumps(population)))
+
+##################################################
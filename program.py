@@ -1,13 +1,14 @@
 #Importing necessary PyQt5 and SQLite3 Modules
-from PyQt5.QtWidgets import QWidget, QApplication, QListWidgetItem, QMessageBox, QInputDialog, QProgressBar, QVBoxLayout
+from PyQt5.QtWidgets import QWidget, QApplication, QMessageBox, QInputDialog, QProgressBar, QVBoxLayout, QPushButton
 from PyQt5.uic import loadUi
-from PyQt5 import QtCore
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QAbstractListModel, QModelIndex
 import sys
-import sqlite3
 import datetime as dateTime
 import calendar
-from geneticAlgorithm import geneticAlgorithm #Genetic algorithm function
+import multiprocessing
+from bisect import bisect_left
+from geneticAlgorithm import geneticAlgorithm, optimiseDateRange, TerminationCriteria #Genetic algorithm functions
+from plannerDatabase import PlannerDatabase #Planner table access
 
 
 #Function to get all dates within planner application 
@@ -39,11 +40,198 @@ def getAllDates(year, month):
     return allDates
 
 
+#Class that runs the genetic algorithm in a background thread so the window stays responsive
+class OptimiserThread(QThread):
+    progressChanged = pyqtSignal(float)
+    generationFinished = pyqtSignal(int, float, object)
+    optimisationFinished = pyqtSignal(object)
+    optimisationFailed = pyqtSignal(str)
+
+    def __init__(self, tasks, parent=None, initialPopulation=None):
+        super(OptimiserThread, self).__init__(parent)
+        self.tasks = tasks
+        self.initialPopulation = initialPopulation
+        self.termination = TerminationCriteria()
+
+    def run(self):
+        try:
+            result = geneticAlgorithm(self.tasks, progressCallback=self.progressChanged.emit,
+                                      generationCallback=self.generationFinished.emit, termination=self.termination,
+                                      initialPopulation=self.initialPopulation)
+        except Exception as error:
+            self.optimisationFailed.emit(str(error))
+            return
+        self.optimisationFinished.emit(result)
+
+    def cancel(self):
+        # The genetic algorithm stops at the next generation and keeps its best schedule so far
+        self.termination.cancel()
+
+
+#Class that optimises several dates in the background, each day runs in its own process
+class BatchOptimiserThread(QThread):
+    progressChanged = pyqtSignal(float)
+    optimisationFinished = pyqtSignal(object)
+    optimisationFailed = pyqtSignal(str)
+
+    def __init__(self, tasks, parent=None, initialPopulations=None):
+        super(BatchOptimiserThread, self).__init__(parent)
+        self.tasks = tasks
+        self.initialPopulations = initialPopulations
+        self.stopEvent = multiprocessing.Event()
+
+    def run(self):
+        try:
+            result = optimiseDateRange(self.tasks, progressCallback=self.progressChanged.emit, stopEvent=self.stopEvent,
+                                       initialPopulations=self.initialPopulations)
+        except Exception as error:
+            self.optimisationFailed.emit(str(error))
+            return
+        self.optimisationFinished.emit(result)
+
+    def cancel(self):
+        # Running days stop at their next generation and keep their best schedule so far, days not started are skipped
+        self.stopEvent.set()
+
+
+#Class that shows the planner rows of one date, or of every date, in the task list
+class TaskListModel(QAbstractListModel):
+    """
+    List model backed by the planner database
+
+    Args:
+    database (PlannerDatabase): Database the rows are read from
+    parent (QObject): Parent object
+
+    Rows are read a page at a time as the view scrolls (canFetchMore/fetchMore), so only the rows
+    that have been shown are held in memory. Adding, editing and deleting a task inserts, moves or
+    removes just that row instead of reloading the list
+    """
+
+    pageSize = 100
+    priorityMapping = {1: "One-time event", 2: "Occasional event", 3: "Regular Event", 4: "Everyday Event"}
+
+    def __init__(self, database, parent=None):
+        super(TaskListModel, self).__init__(parent)
+        self.database = database
+        self.date = None
+        self.rows = []  # Planner rows (id, task, completed, date, startTime, endTime, priority) read so far
+        self.keys = []  # (date, startTime, id) of each row, the order the rows are listed in
+        self.checked = {}  # Row id -> check state the user set that hasn't been saved yet
+        self.allFetched = False
+
+    # Function to show the tasks of another date, or every task when date is None
+    def setDate(self, date=None):
+        self.beginResetModel()
+        self.date = date
+        self.rows = []
+        self.keys = []
+        self.checked = {}
+        self.allFetched = False
+        self.endResetModel()
+
+        # Read the first page now so the list is filled straight away, later pages are read as the view scrolls
+        self.fetchMore()
+
+    @staticmethod
+    def rowKey(row):
+        return (row[3], row[4], row[0])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.allFetched
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        after = self.keys[-1] if self.keys else ('', '', 0)
+        page = self.database.taskPage(self.date, after, self.pageSize)
+        self.allFetched = len(page) < self.pageSize
+        if not page:
+            return
+
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+        self.rows.extend(page)
+        self.keys.extend(self.rowKey(row) for row in page)
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        taskId, task, completed, date, startTime, endTime, priority = self.rows[index.row()]
+
+        if role == Qt.DisplayRole:
+            return f"{task} - {startTime} - {endTime} - Priority: {self.priorityMapping.get(priority, 'Unknown')}"
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if self.isChecked(index.row()) else Qt.Unchecked
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.CheckStateRole:
+            return False
+        self.checked[self.rows[index.row()][0]] = value == Qt.Checked
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index):
+        return super(TaskListModel, self).flags(index) | Qt.ItemIsUserCheckable
+
+    def isChecked(self, row):
+        taskId, completed = self.rows[row][0], self.rows[row][2]
+        return self.checked.get(taskId, completed == "YES")
+
+    def task(self, row):
+        return self.rows[row]
+
+    # Function to list the (task id, completed) changes of the rows the user ticked or unticked
+    def checkedChanges(self):
+        return list(self.checked.items())
+
+    # Function to add the row of a new or moved task in its sorted place.
+    # A row past the last page read is left for fetchMore to pick up
+    def insertTask(self, taskId):
+        row = self.database.taskById(taskId)
+        if row is None or (self.date is not None and row[3] != str(self.date)):
+            return
+        key = self.rowKey(row)
+        position = bisect_left(self.keys, key)
+        if position == len(self.rows) and not self.allFetched:
+            return
+
+        self.beginInsertRows(QModelIndex(), position, position)
+        self.rows.insert(position, row)
+        self.keys.insert(position, key)
+        self.endInsertRows()
+
+    def removeTask(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        taskId = self.rows.pop(row)[0]
+        del self.keys[row]
+        self.checked.pop(taskId, None)
+        self.endRemoveRows()
+
+    # Function to re-read a task after it was edited, its start time decides where it now belongs
+    def updateTask(self, row):
+        taskId = self.rows[row][0]
+        checked = self.checked.get(taskId)
+        self.removeTask(row)
+        if checked is not None:
+            self.checked[taskId] = checked
+        self.insertTask(taskId)
+
+
 #Class that initalises the main window of the planner application
 class Window(QWidget):
     def __init__(self):
         super(Window, self).__init__()
         loadUi("main.ui", self)
+        #One connection to the planner database is kept open for the lifetime of the window
+        self.database = PlannerDatabase('data.db')
+        #The task list reads its rows from the database a page at a time
+        self.taskModel = TaskListModel(self.database, self)
+        self.listView.setModel(self.taskModel)
         #Button and planner functionality
         self.calendarWidget.selectionChanged.connect(self.calendarDateChanged)
         self.calendarDateChanged()
@@ -53,15 +241,31 @@ class Window(QWidget):
         self.priorityComboBox.addItems(["One-time event", "Occasional event", "Regular Event", "Everyday Event"])
         self.editButton.clicked.connect(self.editTask)
         self.editButton.clicked.connect(self.editTask)
-        self.listWidget.itemSelectionChanged.connect(self.handleItemSelectionChanged)
+        self.listView.selectionModel().selectionChanged.connect(self.handleItemSelectionChanged)
         self.clearButton.clicked.connect(self.clearPlanner)
         self.optimiseButton.clicked.connect(self.optimiseSchedule)
 
         #Layout Setup
         self.progressBar = None
+        self.cancelButton = None
+        self.optimiserThread = None
         self.layout = QVBoxLayout()
         self.setLayout(self.layout)
 
+        #Batch optimisation of the week or month around the selected date
+        self.optimiseWeekButton = QPushButton("Optimise Week")
+        self.optimiseWeekButton.clicked.connect(self.optimiseWeek)
+        self.layout.addWidget(self.optimiseWeekButton)
+        self.optimiseMonthButton = QPushButton("Optimise Month")
+        self.optimiseMonthButton.clicked.connect(self.optimiseMonth)
+        self.layout.addWidget(self.optimiseMonthButton)
+
+    def closeEvent(self, event):
+        if self.optimiserThread:
+            self.optimiserThread.cancel()
+            self.optimiserThread.wait()
+        self.database.close()
+        super(Window, self).closeEvent(event)
 
     def showProgressBar(self):
         #Create and customise progress bar
@@ -73,72 +277,186 @@ class Window(QWidget):
         self.layout.addWidget(self.progressBar)
         self.progressBar.show()
 
+        #Cancel button stops the optimisation early
+        self.cancelButton = QPushButton("Cancel")
+        self.cancelButton.clicked.connect(self.cancelOptimisation)
+        self.layout.addWidget(self.cancelButton)
+        self.cancelButton.show()
+
     def hideProgressBar(self):
         if self.progressBar:
             self.progressBar.hide()
             self.layout.removeWidget(self.progressBar)
             self.progressBar.deleteLater()  # Remove progress bar from memory
             self.progressBar = None  # Reset progress bar variable
+
+        if self.cancelButton:
+            self.cancelButton.hide()
+            self.layout.removeWidget(self.cancelButton)
+            self.cancelButton.deleteLater()
+            self.cancelButton = None
     
     def updateProgressBar(self, value):
-        self.progressBar.setValue(int(value))
+        if self.progressBar:
+            self.progressBar.setValue(int(value))
+
+    def showGenerationProgress(self, generation, bestFitness, bestSchedule):
+        if not self.progressBar:
+            return
+
+        #Show the current best fitness on the progress bar and preview the best schedule in its tooltip
+        self.progressBar.setFormat(f"Generation {generation} - Best Fitness {bestFitness:.2f}")
+        self.progressBar.setToolTip("\n".join(f"{task['task_name']} - {task['start_time']} - {task['end_time']}" for task in bestSchedule))
+
+    def cancelOptimisation(self):
+        if self.optimiserThread:
+            self.optimiserThread.cancel()
+            self.cancelButton.setEnabled(False)
 
     #Function to optimise the schedule using the genetic algorithm
     def optimiseSchedule(self):
+        # Only one optimisation can run at a time
+        if self.optimiserThread:
+            return
+
+        selectedDate = self.calendarWidget.selectedDate().toPyDate()
+
+        # Fetch tasks from SQLite for the specific date
+        tasks = self.database.loadTasks(selectedDate, selectedDate)
+
+        print(f"Optimizing schedule for date: {selectedDate}")
+
+        initialPopulation = self.savedPopulation(selectedDate, tasks)
+
         # Show progress bar
         self.showProgressBar()
+        self.setOptimiseButtonsEnabled(False)
+
+        # Run genetic algorithm for the specific date in the background
+        self.optimiserThread = OptimiserThread(tasks, self, initialPopulation)
+        self.optimiserThread.progressChanged.connect(self.updateProgressBar)
+        self.optimiserThread.generationFinished.connect(self.showGenerationProgress)
+        self.optimiserThread.optimisationFinished.connect(lambda result: self.finishOptimisation(result, selectedDate))
+        self.optimiserThread.optimisationFailed.connect(self.optimisationFailed)
+        self.optimiserThread.start()
 
+    def optimiseWeek(self):
         selectedDate = self.calendarWidget.selectedDate().toPyDate()
+        monday = selectedDate - dateTime.timedelta(days=selectedDate.weekday())
+        self.optimiseDates([monday + dateTime.timedelta(days=day) for day in range(7)])
 
-        # Fetch tasks from SQLite for the specific date
-        conn = sqlite3.connect('data.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM planner WHERE date = ?", (selectedDate,))
-        taskData = cursor.fetchall()
-        conn.close()
+    def optimiseMonth(self):
+        selectedDate = self.calendarWidget.selectedDate().toPyDate()
+        self.optimiseDates(getAllDates(selectedDate.year, selectedDate.month))
+
+    #Function to optimise every date in a list at once
+    def optimiseDates(self, dates):
+        if self.optimiserThread:
+            return
 
-        tasks = [{'task_name': row[1], 'date': row[3], 'start_time': row[4], 'end_time': row[5], 'priority': row[6]} for row in taskData]
+        # Fetch the tasks for every date in one query
+        tasks = self.database.loadTasks(dates[0], dates[-1])
 
-        print(f"Optimizing schedule for date: {selectedDate}")
+        print(f"Optimizing schedules from {dates[0]} to {dates[-1]}")
+
+        initialPopulations = {}
+        for date in dates:
+            initialPopulation = self.savedPopulation(date, [task for task in tasks if task['date'] == str(date)])
+            if initialPopulation:
+                initialPopulations[str(date)] = initialPopulation
+
+        self.showProgressBar()
+        self.setOptimiseButtonsEnabled(False)
 
-        # Run genetic algorithm for the specific date
-        optimiseSchedule = geneticAlgorithm(tasks, progressCallback=self.updateProgressBar)
+        self.optimiserThread = BatchOptimiserThread(tasks, self, initialPopulations)
+        self.optimiserThread.progressChanged.connect(self.updateProgressBar)
+        self.optimiserThread.optimisationFinished.connect(self.finishBatchOptimisation)
+        self.optimiserThread.optimisationFailed.connect(self.optimisationFailed)
+        self.optimiserThread.start()
 
-        print(f"Optimized schedule for date {selectedDate}: {optimiseSchedule}")
+    def finishBatchOptimisation(self, result):
+        # Write every optimised day back in a single transaction
+        rowsAffected = self.database.replaceDays(result['schedules'])
+        for date, dayResult in result['days'].items():
+            self.database.savePopulation(date, dayResult['finalPopulation'])
+
+        for date, dayResult in result['days'].items():
+            print(f"{date}: Best Fitness {dayResult['bestFitness']} in {dayResult['elapsedSeconds']:.2f}s ({dayResult['stopReason']} after {dayResult['generations']} generations)")
+        print(f"Optimised {len(result['days'])} days in {result['elapsedSeconds']:.2f}s ({result['stopReason']}), {rowsAffected} rows affected")
+
+        self.updateList(self.calendarWidget.selectedDate().toPyDate())
+
+        self.stopOptimiserThread()
+
+    #Function to get the population saved by the last optimisation of a date, if there is one
+    def savedPopulation(self, date, tasks):
+        saved = self.database.loadPopulation(date)
+        if saved is None or not tasks:
+            return None
+
+        # Tasks edited since are matched up again by importPopulation, with their new durations
+        print(f"Warm starting {date} from its last optimisation")
+        return saved
+
+    def setOptimiseButtonsEnabled(self, enabled):
+        self.optimiseButton.setEnabled(enabled)
+        self.optimiseWeekButton.setEnabled(enabled)
+        self.optimiseMonthButton.setEnabled(enabled)
+
+    def finishOptimisation(self, result, selectedDate):
+        optimiseSchedule = result['bestSchedule']
+
+        print(f"Optimized schedule for date {selectedDate}: {optimiseSchedule} ({result['stopReason']} after {result['generations']} generations)")
 
         # Update the planner with the optimized schedule for the specific date
         self.updatePlannerWithSchedule(optimiseSchedule, [selectedDate])
 
+        # Keep the final population, the next optimisation of this date starts from it
+        self.database.savePopulation(selectedDate, result['finalPopulation'])
+
         # Update the list widget with the tasks for the currently selected date
         self.updateList(selectedDate)
 
+        self.stopOptimiserThread()
+
+    def optimisationFailed(self, error):
+        self.stopOptimiserThread()
+
+        messageBox = QMessageBox()
+        messageBox.setText(f"Schedule could not be optimised: {error}")
+        messageBox.setStandardButtons(QMessageBox.Ok)
+        messageBox.exec()
+
+    def stopOptimiserThread(self):
         # Hide progress bar
         self.hideProgressBar()
+        self.setOptimiseButtonsEnabled(True)
+
+        self.optimiserThread.wait()
+        self.optimiserThread.deleteLater()
+        self.optimiserThread = None
 
     
     #Function to update the planner with the optimised schedule
     def updatePlannerWithSchedule(self, schedule, dates):
-        conn = sqlite3.connect('data.db')
-        cursor = conn.cursor()
-
-        # Clear existing tasks for the selected dates
-        for date in dates:
-            cursor.execute("DELETE FROM planner WHERE date = ?", (date,))
-
-            # Insert the optimized schedule into the planner for each date
-            for task in schedule:
-                query = "INSERT INTO planner (task, completed, date, startTime, endTime, priority) VALUES (?, ?, ?, ?, ?, ?)"
-                row = (task.get('task_name', ''), "NO", date, task.get('start_time', ''), task.get('end_time', ''), task.get('priority', ''))
-                cursor.execute(query, row)
-
-        conn.commit()
+        # Clear existing tasks for the selected dates and insert the optimized schedule in their place
+        rowsAffected = self.database.replaceSchedule(schedule, dates)
+        print(f"Planner updated: {rowsAffected} rows affected")
         
 
     def handleItemSelectionChanged(self):
         # Enable or disable edit and delete buttons based on selection
-        selectedItems = self.listWidget.selectedItems()
-        self.editButton.setEnabled(len(selectedItems) == 1)
-        self.deleteButton.setEnabled(len(selectedItems) == 1)
+        selectedRows = self.listView.selectionModel().selectedRows()
+        self.editButton.setEnabled(len(selectedRows) == 1)
+        self.deleteButton.setEnabled(len(selectedRows) == 1)
+
+    #Function to get the selected row of the task list, or None
+    def selectedRow(self):
+        selectedRows = self.listView.selectionModel().selectedRows()
+        if not selectedRows:
+            return None
+        # Assuming only one item is selected
+        return selectedRows[0].row()
         
 
     def calendarDateChanged(self):
@@ -148,73 +466,22 @@ class Window(QWidget):
         self.updateList(dateSelected)
 
 
-    #Function to update the list of tasks in the planner
+    #Function to update the list of tasks in the planner, every task is listed when no date is given
     def updateList(self, date=None):
-        self.listWidget.clear()
-
-        conn = sqlite3.connect('data.db')
-        cursor = conn.cursor()
-
-        if date is not None:
-            query = "SELECT task, completed, startTime, endTime, priority FROM planner WHERE date = ?"
-            row = (date,)
-        else:
-            query = "SELECT task, completed, startTime, endTime, priority FROM planner"
-            row = ()
-
-        results = cursor.execute(query, row).fetchall()
-
-        priority_mapping = {1: "One-time event", 2: "Occasional event", 3: "Regular Event", 4: "Everyday Event"}
-
-        # Add tasks to the list widget
-        for result in results:
-            task = result[0]
-            completed = result[1]
-            start_time = result[2]
-            end_time = result[3]
-            priority_value = result[4]
-            priority_word = priority_mapping.get(priority_value, "Unknown")
-
-            item = QListWidgetItem(f"{task} - {start_time} - {end_time} - Priority: {priority_word}")
-            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
-            item.setCheckState(QtCore.Qt.Unchecked)
-            if result[1] == "YES":
-                item.setCheckState(QtCore.Qt.Checked)
-            elif result[1] == "NO":
-                item.setCheckState(QtCore.Qt.Unchecked)
-            self.listWidget.addItem(item)
+        self.taskModel.setDate(date)
 
 
     def saveChanges(self):
-        conn = sqlite3.connect('data.db')
-        cursor = conn.cursor()
-
-        date = self.calendarWidget.selectedDate().toPyDate()
-
-        for i in range(self.listWidget.count()):
-            item = self.listWidget.item(i)
-            task = item.text()
-            if item.checkState() == QtCore.Qt.Checked:
-                query = "UPDATE planner SET completed = 'YES' WHERE task = ? AND date = ?"
-            else:
-                query = "UPDATE planner SET completed = 'NO' WHERE task = ? AND date = ?"
-        
-            row = (task, date,)
-
-            cursor.execute(query, row)
-
-        conn.commit()
+        # Only the tasks that were ticked or unticked since the list was loaded are written
+        rowsAffected = self.database.setCompletedMany(self.taskModel.checkedChanges())
 
         messageBox = QMessageBox()
-        messageBox.setText("Changes have been saved")
+        messageBox.setText(f"Changes have been saved ({rowsAffected} rows updated)")
         messageBox.setStandardButtons(QMessageBox.Ok)
         messageBox.exec()
 
 
     def addTask(self):
-        conn = sqlite3.connect('data.db')
-        cursor = conn.cursor()
-
         newTask = str(self.taskLineEdit.text())
 
         newStartTime = str(self.startTimeEdit.text())
@@ -225,44 +492,21 @@ class Window(QWidget):
         priorityMapping = {"One-time event": 1, "Occasional event": 2, "Regular Event": 3, "Everyday Event": 4}
         priority = priorityMapping.get(self.priorityComboBox.currentText(), 0)
 
-        query = "INSERT INTO planner (task, completed, date, startTime, endTime, priority) VALUES (?, ?, ?, ?, ?, ?)"
-        row = (newTask, "NO", self.calendarWidget.selectedDate().toPyDate(), newStartTime, newEndTime, priority)
-
-        cursor.execute(query, row)
+        taskId = self.database.addTask(newTask, self.calendarWidget.selectedDate().toPyDate(), newStartTime, newEndTime, priority)
 
-        conn.commit()
-
-        self.updateList(self.calendarWidget.selectedDate().toPyDate())
+        self.taskModel.insertTask(taskId)
 
         self.taskLineEdit.setText("")
 
 
     def deleteTask(self):
-        conn = sqlite3.connect('data.db')
-        cursor = conn.cursor()
-
-        date = str(self.calendarWidget.selectedDate().toPyDate())
-        startTime = str(self.startTimeEdit.text())
-        endTime = str(self.endTimeEdit.text())
-
-        selected_items = self.listWidget.selectedItems()
-        if not selected_items:
+        row = self.selectedRow()
+        if row is None:
             return
 
-        # Assuming only one item is selected
-        selected_item = selected_items[0]
-        task_details = selected_item.text().split(" - ")
-
-        # Extracting task details
-        task, date, startTime, endTime = task_details[0], date, task_details[1], task_details[2]
-
-        query = "DELETE FROM planner WHERE task = ? AND date = ? AND startTime = ? AND endTime = ?"
-        row = (task, date, startTime, endTime)
-
-        cursor.execute(query, row)
+        self.database.deleteTaskById(self.taskModel.task(row)[0])
+        self.taskModel.removeTask(row)
         print("Task Deleted")
-
-        conn.commit()
         print("Changes Saved")
 
         messageBox = QMessageBox()
@@ -270,21 +514,15 @@ class Window(QWidget):
         messageBox.setStandardButtons(QMessageBox.Ok)
         messageBox.exec()
 
-        self.updateList(self.calendarWidget.selectedDate().toPyDate())
-
 
     def editTask(self):
 
-        selectedItems = self.listWidget.selectedItems()
-        if not selectedItems:
+        row = self.selectedRow()
+        if row is None:
             return
 
-        # Assuming only one item is selected
-        selectedItems = selectedItems[0]
-        taskDetails = selectedItems.text().split(" - ")
-
         # Extracting task details
-        taskName, startTime, endTime, priority = taskDetails[0], taskDetails[1], taskDetails[2], taskDetails[3].strip()
+        taskId, taskName, completed, date, startTime, endTime, priority = self.taskModel.task(row)
 
         # Ask user for new details
         newTaskName, ok = QInputDialog.getText(self, "Edit Task", "Enter new task name:", text=taskName)
@@ -304,31 +542,17 @@ class Window(QWidget):
             return
 
         # Update the database
-        conn = sqlite3.connect('data.db')
-        cursor = conn.cursor()
-
-        date = self.calendarWidget.selectedDate().toPyDate()
+        self.database.updateTaskById(taskId, newTaskName, newStartTime, newEndTime, newPriority)
 
-        query = "UPDATE planner SET task = ?, startTime = ?, endTime = ?, priority = ? WHERE task = ? AND date = ? AND startTime = ? AND endTime = ? AND priority = ?"
-        row = (newTaskName, newStartTime, newEndTime, newPriority, taskName, date, startTime, endTime, priority)
-
-        cursor.execute(query, row)
-        conn.commit()
-
-        # Update the list widget
-        self.updateList(date)
+        # Move the edited row to where its new start time puts it
+        self.taskModel.updateTask(row)
     
 
     def clearPlanner(self):
         reply = QMessageBox.question(self, 'Message', 'Are you sure you want to clear the planner?', QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
 
         if reply == QMessageBox.Yes:
-            conn = sqlite3.connect('data.db')
-            cursor = conn.cursor()
-
-            query = "DELETE FROM planner"
-            cursor.execute(query)
-            conn.commit()
+            self.database.clear()
 
             self.updateList()
 